@@ -0,0 +1,126 @@
+import numpy as np
+
+from estimators import RunningStats
+
+NUM_TRIALS = 1000
+NUM_RUNS = 2000
+DICE_PROBABILITIES = [0.17, 0.23, 0.37, 0.05, 0.12, 0.06]
+
+# selection strategies of q1.1, q1.2 and q1.3
+STRATEGIES = ['epsilon-greedy', 'optimistic', 'ucb']
+
+# default hyperparameters of each strategy (same values as the q1.x scripts)
+# initial_value='normal' draws the initial action values from N(0, 1) like q1.3 does
+DEFAULT_PARAMS = {
+    'epsilon-greedy': {'eps': 0.01, 'initial_value': 0, 'c': 0},
+    'optimistic': {'eps': 0, 'initial_value': 1, 'c': 0},
+    'ucb': {'eps': 0, 'initial_value': 'normal', 'c': 2},
+}
+
+
+# many independent runs of the same dice bandit, advanced in lockstep
+# action values (Q), pull counts (N) and collected rewards are kept as (runs, arms) running statistics
+class BanditRuns:
+    def __init__(self, probabilities, num_runs, strategy='epsilon-greedy', eps=None, initial_value=None, c=None,
+                 seed=None):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"unknown strategy {strategy!r}, expected one of {STRATEGIES}")
+        defaults = DEFAULT_PARAMS[strategy]
+        self.p = np.asarray(probabilities, dtype=float)
+        self.num_runs = num_runs
+        self.num_arms = len(self.p)
+        self.strategy = strategy
+        self.eps = defaults['eps'] if eps is None else eps
+        self.initial_value = defaults['initial_value'] if initial_value is None else initial_value
+        self.c = defaults['c'] if c is None else c
+        self.best_arm = np.argmax(self.p)
+        self.rng = np.random.default_rng(seed)
+        self.reset()
+
+    def reset(self):
+        shape = (self.num_runs, self.num_arms)
+        if self.initial_value == 'normal':
+            prior = self.rng.normal(0, 1, shape)
+        else:
+            prior = self.initial_value
+        self.stats = RunningStats(shape, prior)
+        self.t = 0
+
+    @property
+    def Q(self):
+        return self.stats.mean
+
+    @property
+    def N(self):
+        return self.stats.count
+
+    @property
+    def rewards(self):
+        return self.stats.total
+
+    def select_actions(self, u_explore, u_arm):
+        if self.strategy == 'ucb':
+            # arms that were never pulled get an infinite bonus, so the first steps are a round-robin over the arms
+            # (the q1.3 loop reaches the same order through log(0) and 0/0 in np.argmax)
+            return np.argmax(self.stats.upper_confidence_bound(self.t, self.c), axis=1)
+
+        actions = np.argmax(self.Q, axis=1)
+        if self.eps > 0:
+            explore = u_explore < self.eps
+            actions[explore] = (u_arm[explore] * self.num_arms).astype(np.int64)
+        return actions
+
+    # one step of every run, using a single vectorized random draw
+    def step(self):
+        u = self.rng.random((3, self.num_runs))
+        actions = self.select_actions(u[0], u[1])
+        new_rewards = (u[2] < self.p[actions]).astype(float)
+
+        # sample-average update of the selected arm of each run
+        self.stats.update((np.arange(self.num_runs), actions), new_rewards)
+        self.t += 1
+        return actions, new_rewards
+
+    # run num_trials steps and return the per-step traces averaged over all runs
+    # action_values has the same (time_step, arm) layout that the q1.x scripts plot
+    # if a TraceRecorder is given, the mean action values are recorded there (with its decimation) instead
+    def run(self, num_trials=NUM_TRIALS, recorder=None):
+        action_values = np.empty((num_trials, self.num_arms)) if recorder is None else None
+        mean_reward = np.empty(num_trials)
+        optimal_action = np.empty(num_trials)
+        for i in range(num_trials):
+            actions, new_rewards = self.step()
+            if recorder is None:
+                action_values[i] = self.Q.mean(axis=0)
+            elif recorder.keeps(i):
+                recorder.record(i, self.Q.mean(axis=0))
+            mean_reward[i] = new_rewards.mean()
+            optimal_action[i] = np.mean(actions == self.best_arm)
+        if recorder is not None:
+            recorder.flush()
+            action_values = recorder.values
+        return {'action_values': action_values, 'mean_reward': mean_reward, 'optimal_action': optimal_action}
+
+
+def run_experiment(strategy, num_runs=NUM_RUNS, num_trials=NUM_TRIALS, probabilities=DICE_PROBABILITIES, seed=None,
+                   recorder=None, **params):
+    bandits = BanditRuns(probabilities, num_runs, strategy=strategy, seed=seed, **params)
+    return bandits.run(num_trials, recorder=recorder)
+
+
+if __name__ == '__main__':
+    import matplotlib.pyplot as plt
+
+    for strategy in STRATEGIES:
+        results = run_experiment(strategy, seed=0)
+        print(strategy, " mean reward (last 100 steps): ", results['mean_reward'][-100:].mean(),
+              " optimal action (last 100 steps): ", results['optimal_action'][-100:].mean())
+
+        plt.figure()
+        plt.ylabel("action_value")
+        plt.xlabel("time_step")
+        plt.title(f"{strategy} (mean of {NUM_RUNS} runs)")
+        for k in range(len(DICE_PROBABILITIES)):
+            plt.plot(results['action_values'][:, k], label=str(k + 1))
+        plt.legend()
+    plt.show()
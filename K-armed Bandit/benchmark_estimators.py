@@ -0,0 +1,51 @@
+import time
+
+import numpy as np
+
+from estimators import RunningStats
+
+# number of pulls of a single arm for each benchmark row
+PULL_COUNTS = [1000, 2000, 4000, 8000, 16000]
+P = 0.37
+
+
+# the original q1.2 estimator: keep every reward and recompute the mean on each pull
+class ListMean:
+    def __init__(self, initial_value=1):
+        self.current_action_value = initial_value
+        self.rewards = []
+
+    def update_action_value(self, new_reward):
+        self.rewards.append(new_reward)
+        self.current_action_value = np.mean(self.rewards)
+
+
+# the streaming estimator used by q1.2 now
+class StreamingMean:
+    def __init__(self, initial_value=1):
+        self.current_action_value = initial_value
+        self.stats = RunningStats(initial_value=initial_value)
+
+    def update_action_value(self, new_reward):
+        self.stats.update((), new_reward)
+        self.current_action_value = float(self.stats.mean)
+
+
+def time_estimator(estimator, rewards):
+    start = time.perf_counter()
+    estimates = np.empty(len(rewards))
+    for i, reward in enumerate(rewards):
+        estimator.update_action_value(reward)
+        estimates[i] = estimator.current_action_value
+    return time.perf_counter() - start, estimates
+
+
+if __name__ == '__main__':
+    rng = np.random.default_rng(0)
+    print(f"{'pulls':>8} {'list [s]':>10} {'streaming [s]':>14} {'speedup':>8} {'identical':>10}")
+    for num_pulls in PULL_COUNTS:
+        rewards = (rng.random(num_pulls) < P).astype(int).tolist()
+        list_time, list_estimates = time_estimator(ListMean(), rewards)
+        streaming_time, streaming_estimates = time_estimator(StreamingMean(), rewards)
+        identical = np.array_equal(list_estimates, streaming_estimates)
+        print(f"{num_pulls:>8} {list_time:>10.4f} {streaming_time:>14.4f} {list_time / streaming_time:>8.1f} {str(identical):>10}")
@@ -0,0 +1,48 @@
+import numpy as np
+
+
+# constant-size running statistics of the rewards of every arm: count, mean and variance
+# the mean is kept as an exact running sum of rewards, so it equals np.mean over the full reward history
+# while the arm has not been pulled yet its estimate is the prior (e.g. an optimistic initial value)
+class RunningStats:
+    def __init__(self, shape=(), initial_value=0.0):
+        self.prior = np.array(np.broadcast_to(np.asarray(initial_value, dtype=float), shape))
+        self.count = np.zeros(shape, dtype=np.int64)
+        self.total = np.zeros(shape)
+        # sum of squared deviations from the mean (Welford), used for the variance
+        self.m2 = np.zeros(shape)
+
+    # add one reward per indexed arm, index can be () for scalar stats, an int or a tuple of index arrays
+    # indices inside a single update must be unique
+    def update(self, index, reward):
+        count = self.count[index]
+        old_mean = np.where(count > 0, self.total[index] / np.maximum(count, 1), 0)
+        self.count[index] = count + 1
+        self.total[index] += reward
+        new_mean = self.total[index] / (count + 1)
+        self.m2[index] += (reward - old_mean) * (reward - new_mean)
+
+    @property
+    def mean(self):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(self.count > 0, self.total / self.count, self.prior)
+
+    # unbiased sample variance, 0 until an arm has two rewards
+    @property
+    def variance(self):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(self.count > 1, self.m2 / (self.count - 1), 0.0)
+
+    # normal-approximation confidence interval of the mean
+    def confidence_interval(self, z=1.96):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            half_width = np.where(self.count > 0, z * np.sqrt(self.variance / self.count), np.inf)
+        mean = self.mean
+        return mean - half_width, mean + half_width
+
+    # UCB score mean + c * sqrt(log(t) / N), arms that were never pulled get an infinite bound
+    def upper_confidence_bound(self, t, c):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            bonus = c * np.sqrt(np.log(t) / self.count)
+        bonus = np.where(self.count == 0, np.inf, bonus)
+        return self.mean + bonus
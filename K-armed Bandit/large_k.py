@@ -0,0 +1,174 @@
+import argparse
+import time
+
+import numpy as np
+
+from bandit_engine import DEFAULT_PARAMS, DICE_PROBABILITIES, STRATEGIES
+
+
+# tournament (max segment) tree over num_values scores: winner[node] is the index of the largest score below node,
+# so the argmax is winner[1] in O(1) and changing one score replays only its path to the root in O(log K)
+# ties go to the lower index, like np.argmax
+class TournamentTree:
+    def __init__(self, scores):
+        num_values = len(scores)
+        self.size = 1 << max(0, (num_values - 1).bit_length())
+        # leaves beyond the last arm never win
+        self.scores = np.full(self.size, -np.inf)
+        self.winner = np.zeros(2 * self.size, dtype=np.int64)
+        self.rebuild(scores)
+
+    # recompute every score and the whole tree, level by level with array operations, O(K)
+    def rebuild(self, scores):
+        self.scores[:len(scores)] = scores
+        self.winner[self.size:] = np.arange(self.size)
+        start = self.size // 2
+        while start:
+            left = self.winner[2 * start:4 * start:2]
+            right = self.winner[2 * start + 1:4 * start:2]
+            self.winner[start:2 * start] = np.where(self.scores[left] >= self.scores[right], left, right)
+            start //= 2
+
+    def update(self, index, score):
+        scores, winner = self.scores, self.winner
+        scores[index] = score
+        node = (index + self.size) >> 1
+        while node:
+            left, right = winner[2 * node], winner[2 * node + 1]
+            winner[node] = left if scores[left] >= scores[right] else right
+            node >>= 1
+
+    def argmax(self):
+        return int(self.winner[1])
+
+
+# one bandit with a large number of Bernoulli arms (probabilities: success probability of every arm, any length)
+# the selection score of every arm is kept in a TournamentTree, so selecting an arm and updating the pulled arm both
+# cost O(log K) instead of an O(K) argmax per step:
+# - epsilon-greedy / optimistic: the score is the action value Q
+# - ucb: the score is Q + c * sqrt(ln(t_ref) / N), where t_ref is the step of the last full refresh of the bounds.
+#   The bounds are refreshed (O(K)) whenever t has doubled since, so ln(t_ref) is always within ln(2) of ln(t) and
+#   the refresh costs O(K log T) over T steps. Every arm is pulled once first (explicit round-robin, vectorized),
+#   so neither ln(0) nor a division by N = 0 ever occurs
+class LargeKBandit:
+    def __init__(self, probabilities, strategy='ucb', eps=None, initial_value=None, c=None, seed=None,
+                 block_size=4096):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"unknown strategy {strategy!r}, expected one of {STRATEGIES}")
+        defaults = DEFAULT_PARAMS[strategy]
+        self.p = np.asarray(probabilities, dtype=float)
+        self.num_arms = len(self.p)
+        self.strategy = strategy
+        self.eps = defaults['eps'] if eps is None else eps
+        self.initial_value = defaults['initial_value'] if initial_value is None else initial_value
+        self.c = defaults['c'] if c is None else c
+        self.best_arm = int(np.argmax(self.p))
+        self.rng = np.random.default_rng(seed)
+        self.block_size = block_size
+
+        if self.initial_value == 'normal':
+            self.Q = self.rng.normal(0, 1, self.num_arms)
+        else:
+            self.Q = np.full(self.num_arms, float(self.initial_value))
+        self.N = np.zeros(self.num_arms, dtype=np.int64)
+        self.t = 0
+        self.t_ref = 0
+        self.tree = TournamentTree(self.Q) if strategy != 'ucb' else None
+        self._uniforms = []
+        self._position = 0
+
+    def _uniform(self):
+        if self._position == len(self._uniforms):
+            self._uniforms = self.rng.random(self.block_size).tolist()
+            self._position = 0
+        u = self._uniforms[self._position]
+        self._position += 1
+        return u
+
+    def _ucb_scores(self, t):
+        return self.Q + self.c * np.sqrt(np.log(t) / self.N)
+
+    # UCB start: the next num_steps unpulled arms pulled once in arm order with one vectorized draw, the first bounds
+    # are built once every arm has been pulled
+    def _round_robin(self, num_steps):
+        arms = np.arange(self.t, min(self.t + num_steps, self.num_arms))
+        rewards = (self.rng.random(len(arms)) < self.p[arms]).astype(float)
+        self.N[arms] += 1
+        self.Q[arms] += (rewards - self.Q[arms]) / self.N[arms]
+        self.t += len(arms)
+        if self.t == self.num_arms:
+            self.t_ref = self.t
+            self.tree = TournamentTree(self._ucb_scores(self.t_ref))
+        return arms, rewards
+
+    def select(self):
+        if self.eps > 0 and self._uniform() < self.eps:
+            return min(int(self._uniform() * self.num_arms), self.num_arms - 1)
+        return self.tree.argmax()
+
+    def step(self):
+        if self.strategy == 'ucb' and self.t < self.num_arms:
+            arms, rewards = self._round_robin(1)
+            return int(arms[0]), float(rewards[0])
+        if self.strategy == 'ucb' and self.t >= 2 * self.t_ref:
+            self.t_ref = self.t
+            self.tree.rebuild(self._ucb_scores(self.t_ref))
+        arm = self.select()
+        reward = 1.0 if self._uniform() < self.p[arm] else 0.0
+        self.N[arm] += 1
+        self.Q[arm] += (reward - self.Q[arm]) / self.N[arm]
+        self.t += 1
+        if self.strategy == 'ucb':
+            self.tree.update(arm, self.Q[arm] + self.c * np.sqrt(np.log(self.t_ref) / self.N[arm]))
+        else:
+            self.tree.update(arm, self.Q[arm])
+        return arm, reward
+
+    # run num_steps steps, returns the pulled arm and the reward of every step
+    def run(self, num_steps):
+        actions = np.empty(num_steps, dtype=np.int64)
+        rewards = np.empty(num_steps)
+        i = 0
+        if self.strategy == 'ucb' and self.t < self.num_arms:
+            arms, arm_rewards = self._round_robin(num_steps)
+            i = len(arms)
+            actions[:i], rewards[:i] = arms, arm_rewards
+        for i in range(i, num_steps):
+            actions[i], rewards[i] = self.step()
+        return {'actions': actions, 'rewards': rewards, 'optimal_action': actions == self.best_arm}
+
+
+# the same selection with an O(K) argmax per step, for comparison
+def naive_step_time(bandit, num_steps):
+    start = time.perf_counter()
+    for step in range(num_steps):
+        if bandit.strategy == 'ucb':
+            np.argmax(bandit._ucb_scores(bandit.t + 1))
+        else:
+            np.argmax(bandit.Q)
+    return (time.perf_counter() - start) / num_steps
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="large-K bandit with O(log K) arm selection")
+    parser.add_argument('--arms', type=int, nargs='+', default=[len(DICE_PROBABILITIES), 10 ** 3, 10 ** 5, 10 ** 6])
+    parser.add_argument('--steps', type=int, default=100000, help="steps after the initial round-robin")
+    parser.add_argument('--strategy', choices=STRATEGIES, default='ucb')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    for num_arms in args.arms:
+        # the dice for K = 6, otherwise random success probabilities
+        probabilities = DICE_PROBABILITIES if num_arms == len(DICE_PROBABILITIES) else rng.random(num_arms) * 0.5
+        bandit = LargeKBandit(probabilities, args.strategy, seed=args.seed)
+        # the UCB round-robin (one vectorized pull of every arm) is not timed, only the steps driven by the tree are
+        if args.strategy == 'ucb':
+            bandit.run(num_arms)
+        start = time.perf_counter()
+        results = bandit.run(args.steps)
+        seconds = time.perf_counter() - start
+        naive = naive_step_time(bandit, 200)
+        tail = slice(args.steps - args.steps // 10, args.steps)
+        print(f"K = {num_arms:>8}: {args.steps / seconds:>10,.0f} steps/s (O(K) argmax: {1 / naive:>10,.0f} steps/s)  "
+              f"mean reward of the last 10% {results['rewards'][tail].mean():.3f} (best arm {bandit.p.max():.3f})")
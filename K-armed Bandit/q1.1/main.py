@@ -1,9 +1,22 @@
-import matplotlib.pyplot as plt
+import argparse
+import os
+import sys
+
 import numpy as np
 
+# shared bandit modules live in the parent folder
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from trace_recorder import TraceRecorder
+
 NUM_TRIALS = 1000
 EPS = 0.01
 DICE_PROBABILITIES = [0.17, 0.23, 0.37, 0.05, 0.12, 0.06]
+# 0: silent, 1: final results, 2: print all action values on every iteration
+VERBOSE = 1
+# record the action values of every RECORD_EVERY-th time step
+RECORD_EVERY = 1
+# file for the action-value plot (None => show it in a window)
+PLOT_PATH = None
 
 
 class DiceNumber:
@@ -11,7 +24,6 @@ class DiceNumber:
         self.p = p
         self.current_action_value = 0
         self.N = 0
-        self.action_values = []
 
     def get_reward_from_environment(self):
         if np.random.random() < self.p:
@@ -26,6 +38,7 @@ class DiceNumber:
 
 def experiment():
     dice_numbers = [DiceNumber(p) for p in DICE_PROBABILITIES]
+    recorder = TraceRecorder(NUM_TRIALS, len(dice_numbers), every=RECORD_EVERY, verbose=VERBOSE)
 
     for i in range(NUM_TRIALS):
         if np.random.random() < EPS:
@@ -39,27 +52,27 @@ def experiment():
         # update dice_number action_value
         dice_numbers[j].update_action_value(new_reward)
 
-        print("iteration: ", i + 1, " selected-dice-number: ", j + 1, " all action-values: ",
-              [dice_number.current_action_value for dice_number in dice_numbers])
+        # log all dice_numbers action_values for this iteration (only the iterations the recorder keeps or prints)
+        if recorder.keeps(i):
+            recorder.record(i, [dice_number.current_action_value for dice_number in dice_numbers], j)
 
-        # log all dice_numbers action_values for this iteration
-        for dice_number in dice_numbers:
-            dice_number.action_values.append(dice_number.current_action_value)
-
-    # plot the results
-    plt.ylabel("action_value")
-    plt.xlabel("time_step")
-    plt.title("epsilon-greedy epsilon=0.01")
-    plt.plot(dice_numbers[0].action_values, label="1")
-    plt.plot(dice_numbers[1].action_values, label="2")
-    plt.plot(dice_numbers[2].action_values, label="3")
-    plt.plot(dice_numbers[3].action_values, label="4")
-    plt.plot(dice_numbers[4].action_values, label="5")
-    plt.plot(dice_numbers[5].action_values, label="6")
-    plt.legend()
-    plt.show()
+    # plot the results (shown, or saved to PLOT_PATH without a GUI backend)
+    recorder.show(f"epsilon-greedy epsilon={EPS}", PLOT_PATH)
 
 
 # Press the green button in the gutter to run the script.
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="epsilon-greedy action selection on the unfair dice")
+    parser.add_argument('--trials', type=int, default=NUM_TRIALS)
+    parser.add_argument('--eps', type=float, default=EPS, help="probability of a random action")
+    parser.add_argument('--verbose', type=int, choices=[0, 1, 2], default=VERBOSE)
+    parser.add_argument('--record-every', type=int, default=RECORD_EVERY)
+    parser.add_argument('--plot', default=PLOT_PATH, help="save the plot to this file instead of showing it")
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    NUM_TRIALS, EPS, VERBOSE = args.trials, args.eps, args.verbose
+    RECORD_EVERY, PLOT_PATH = args.record_every, args.plot
+    if args.seed is not None:
+        np.random.seed(args.seed)
     experiment()
@@ -0,0 +1,84 @@
+import argparse
+import csv
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from bandit_engine import DEFAULT_PARAMS, DICE_PROBABILITIES, NUM_TRIALS, BanditRuns
+
+
+# one configuration per hyperparameter value: epsilon-greedy per eps, optimistic per initial value, UCB per C
+def build_grid(eps_values=(), initial_values=(), c_values=()):
+    configs = [{'strategy': 'epsilon-greedy', 'eps': eps} for eps in eps_values]
+    configs += [{'strategy': 'optimistic', 'initial_value': value} for value in initial_values]
+    configs += [{'strategy': 'ucb', 'c': c} for c in c_values]
+    # fill in the strategy defaults, so every config lists all of its hyperparameters
+    return [{'strategy': config['strategy'], **DEFAULT_PARAMS[config['strategy']], **config} for config in configs]
+
+
+# a single (config, seed) job, its random stream only depends on the base seed and the job's position in the grid
+def run_job(job):
+    config_index, seed_index, config, num_runs, num_trials, base_seed = job
+    seed = np.random.SeedSequence(base_seed, spawn_key=(config_index, seed_index))
+    params = {key: value for key, value in config.items() if key != 'strategy'}
+    bandits = BanditRuns(DICE_PROBABILITIES, num_runs, strategy=config['strategy'], seed=seed, **params)
+    results = bandits.run(num_trials)
+    return config_index, results['mean_reward'], results['optimal_action']
+
+
+# run every config for num_seeds independent jobs of num_runs bandits each, spread over a process pool
+# returns (num_configs, num_trials) arrays of the mean reward and the fraction of optimal actions
+def sweep(configs, num_seeds=8, num_runs=250, num_trials=NUM_TRIALS, base_seed=0, workers=None):
+    jobs = [(i, k, config, num_runs, num_trials, base_seed) for i, config in enumerate(configs) for k in range(num_seeds)]
+    mean_reward = np.zeros((len(configs), num_trials))
+    optimal_action = np.zeros((len(configs), num_trials))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        chunksize = max(1, len(jobs) // (4 * (workers or os.cpu_count() or 1)))
+        for config_index, job_reward, job_optimal in executor.map(run_job, jobs, chunksize=chunksize):
+            mean_reward[config_index] += job_reward / num_seeds
+            optimal_action[config_index] += job_optimal / num_seeds
+    return mean_reward, optimal_action
+
+
+# save the sweep as a compressed npz (one row per config) or a tidy CSV (one row per config and time step)
+def save_results(path, configs, mean_reward, optimal_action):
+    strategies = [config['strategy'] for config in configs]
+    eps = [config['eps'] for config in configs]
+    initial_values = [str(config['initial_value']) for config in configs]
+    c = [config['c'] for config in configs]
+    if path.endswith('.csv'):
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['strategy', 'eps', 'initial_value', 'c', 'time_step', 'mean_reward', 'optimal_action_pct'])
+            for i in range(len(configs)):
+                for t in range(mean_reward.shape[1]):
+                    writer.writerow([strategies[i], eps[i], initial_values[i], c[i], t + 1,
+                                     mean_reward[i, t], 100 * optimal_action[i, t]])
+    else:
+        np.savez_compressed(path, strategy=np.array(strategies), eps=np.array(eps, dtype=float),
+                            initial_value=np.array(initial_values), c=np.array(c, dtype=float),
+                            mean_reward=mean_reward, optimal_action_pct=100 * optimal_action)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="parallel parameter sweep over bandit strategies")
+    parser.add_argument('--eps', type=float, nargs='*', default=[0.01, 0.1, 1], help="epsilon-greedy epsilons")
+    parser.add_argument('--initial-values', type=float, nargs='*', default=[1], help="optimistic initial values")
+    parser.add_argument('--c', type=float, nargs='*', default=[2], help="UCB exploration constants")
+    parser.add_argument('--seeds', type=int, default=8, help="independent jobs per config")
+    parser.add_argument('--runs', type=int, default=250, help="bandit runs per job")
+    parser.add_argument('--trials', type=int, default=NUM_TRIALS, help="time steps per run")
+    parser.add_argument('--seed', type=int, default=0, help="base seed of the sweep")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument('--out', default='sweep.npz', help="result file, .npz or .csv")
+    args = parser.parse_args()
+
+    configs = build_grid(args.eps, args.initial_values, args.c)
+    mean_reward, optimal_action = sweep(configs, args.seeds, args.runs, args.trials, args.seed, args.workers)
+    save_results(args.out, configs, mean_reward, optimal_action)
+
+    for config, reward, optimal in zip(configs, mean_reward, optimal_action):
+        print(config, " final mean reward: ", round(reward[-100:].mean(), 4),
+              " final optimal action %: ", round(100 * optimal[-100:].mean(), 2))
+    print("results saved to", args.out)
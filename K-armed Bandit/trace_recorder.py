@@ -0,0 +1,88 @@
+import numpy as np
+
+# verbosity levels
+SILENT = 0
+SUMMARY = 1  # only final results are printed
+ITERATIONS = 2  # one line per iteration, like the original experiment() loops
+
+SUMMARY_COLUMNS = ['min', 'mean', 'max']
+
+
+# records the action values of an experiment into a preallocated array instead of per-dice Python lists
+# every: only every k-th time step is kept (steps 0, k, 2k, ...)
+# summary: keep min/mean/max of the action values instead of one column per arm
+# path: write into a memory-mapped .npy file instead of an in-memory array
+class TraceRecorder:
+    def __init__(self, num_steps, num_arms, every=1, summary=False, path=None, verbose=SILENT):
+        if every < 1:
+            raise ValueError("every must be >= 1")
+        self.num_steps = num_steps
+        self.num_arms = num_arms
+        self.every = every
+        self.summary = summary
+        self.verbose = verbose
+        self.columns = SUMMARY_COLUMNS if summary else [str(k + 1) for k in range(num_arms)]
+
+        shape = ((num_steps + every - 1) // every, len(self.columns))
+        if path is None:
+            self.values = np.zeros(shape)
+        else:
+            self.values = np.lib.format.open_memmap(path, mode='w+', dtype=np.float64, shape=shape)
+        self.steps = np.arange(0, num_steps, every)
+
+    # whether record(i, ...) keeps or prints anything, so callers can skip building the action values otherwise
+    def keeps(self, i):
+        return i % self.every == 0 or self.verbose >= ITERATIONS
+
+    # record the action values after time step i (0-based), selected is the 0-based index of the chosen arm
+    def record(self, i, action_values, selected=None):
+        if self.verbose >= ITERATIONS:
+            if isinstance(action_values, np.ndarray):
+                action_values = action_values.tolist()
+            if selected is None:
+                print("iteration: ", i + 1, " all action-values: ", action_values)
+            else:
+                print("iteration: ", i + 1, " selected-dice-number: ", selected + 1, " all action-values: ",
+                      action_values)
+        if i % self.every:
+            return
+        if self.summary:
+            action_values = np.asarray(action_values)
+            self.values[i // self.every] = (action_values.min(), action_values.mean(), action_values.max())
+        else:
+            self.values[i // self.every] = action_values
+
+    def log(self, *args):
+        if self.verbose >= SUMMARY:
+            print(*args)
+
+    def flush(self):
+        if isinstance(self.values, np.memmap):
+            self.values.flush()
+
+    # plot every recorded column against the time step, on pyplot's current figure
+    # path: draw on a standalone Figure and save it there instead, without pyplot or a GUI backend
+    def plot(self, title, path=None):
+        if path is None:
+            import matplotlib.pyplot as plt
+            axes = plt.gca()
+        else:
+            from matplotlib.figure import Figure
+            axes = Figure().subplots()
+
+        axes.set_ylabel("action_value")
+        axes.set_xlabel("time_step")
+        axes.set_title(title)
+        for k, label in enumerate(self.columns):
+            axes.plot(self.steps, self.values[:, k], label=label)
+        axes.legend()
+        if path is not None:
+            axes.figure.savefig(path)
+        return axes.figure
+
+    # plot and show the figure in a window, or save it to path (headless)
+    def show(self, title, path=None):
+        self.plot(title, path)
+        if path is None:
+            import matplotlib.pyplot as plt
+            plt.show()
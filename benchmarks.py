@@ -0,0 +1,308 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from projects import load, project
+
+# benchmark suite of all four projects: throughput (steps/s, episodes/s, backups/s), peak memory and
+# time-to-convergence at several problem sizes, on fixed seeds, written to a JSON file that can be compared with the
+# file of an earlier version to catch performance regressions
+ROOT = os.path.dirname(os.path.abspath(__file__))
+# problem sizes per benchmark, --quick uses the first size of every list only
+SIZES = {
+    'bandit_dice_script': [1000, 5000],  # NUM_TRIALS of the q1.x scripts
+    'bandit_engine': [200, 1000, 4000],  # bandit runs of 1000 steps
+    'golf_td': [1000, 5000],  # training episodes
+    'golf_vector_eval': [10 ** 4, 10 ** 5],  # evaluated episodes
+    'grid_solvers': [25, 100, 300],  # side of a square random grid
+    'mc_reference': [200, 1000],  # episodes of main.monte_carlo
+    'mc_learner': [1000, 10000],  # episodes of MonteCarloLearner
+    'mc_batch_eval': [10 ** 4, 10 ** 5, 10 ** 6],  # episodes of batch_rollout.evaluate_policy
+    'imports': [5],  # fresh interpreters per cold-start import measurement, the fastest one is reported
+}
+# throughput keys compared against a baseline file
+RATE_KEYS = ['steps_per_second', 'episodes_per_second', 'backups_per_second']
+
+
+# run fn() once for the wall time and, if memory is set, once more under tracemalloc for the peak of the Python heap
+# (tracemalloc slows the code down, so the two are measured separately), returns (fn's result, seconds, peak bytes)
+def measure(fn, memory=True):
+    start = time.perf_counter()
+    result = fn()
+    seconds = time.perf_counter() - start
+    peak = None
+    if memory:
+        tracemalloc.start()
+        try:
+            fn()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return result, seconds, peak
+
+
+def _record(project_name, benchmark, size, seconds, peak, **values):
+    record = {'project': project_name, 'benchmark': benchmark, 'size': size, 'seconds': seconds,
+              'peak_memory_bytes': peak}
+    # NumPy scalars => Python numbers for the JSON file
+    record.update({key: value.item() if isinstance(value, np.generic) else value for key, value in values.items()})
+    return record
+
+
+def bench_bandit(sizes, seed, memory):
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    records = []
+    with project('bandit'):
+        from bandit_engine import DICE_PROBABILITIES, BanditRuns
+        # the original per-object DiceNumber scripts, silent and with headless plotting
+        for question in ['q1.1', 'q1.2', 'q1.3']:
+            script = load('bandit', f'{question}/main')
+            script.VERBOSE = 0
+            for num_trials in sizes['bandit_dice_script']:
+                script.NUM_TRIALS = num_trials
+
+                def run():
+                    np.random.seed(seed)
+                    with np.errstate(divide='ignore', invalid='ignore'):
+                        script.experiment()
+                    plt.close('all')
+
+                result, seconds, peak = measure(run, memory)
+                records.append(_record('bandit', f'dice_script_{question}', num_trials, seconds, peak,
+                                       steps_per_second=num_trials / seconds))
+        # the batched engine: num_runs bandits of 1000 steps in lockstep
+        for strategy in ['epsilon-greedy', 'optimistic', 'ucb']:
+            for num_runs in sizes['bandit_engine']:
+                result, seconds, peak = measure(
+                    lambda: BanditRuns(DICE_PROBABILITIES, num_runs, strategy, seed=seed).run(1000), memory)
+                records.append(_record('bandit', f'engine_{strategy}', num_runs, seconds, peak,
+                                       steps_per_second=num_runs * 1000 / seconds))
+    return records
+
+
+def bench_golf(sizes, seed, memory):
+    records = []
+    with project('golf'):
+        from main import Agent, Experiment, GolfEnvironment
+        from monitor import EarlyStopping
+        from vector_env import evaluate_policy, greedy_policy
+
+        for algorithm in ['run_sarsa', 'run_q_learning']:
+            for num_episodes in sizes['golf_td']:
+                def train():
+                    np.random.seed(seed)
+                    environment = GolfEnvironment()
+                    agent = Agent(environment, seed=seed)
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        monitor = getattr(Experiment(agent, environment), algorithm)(num_episodes)
+                    return agent, monitor
+
+                (agent, monitor), seconds, peak = measure(train, memory)
+                steps = int(monitor.steps[:monitor.num_episodes].sum())
+                records.append(_record('golf', algorithm, num_episodes, seconds, peak,
+                                       episodes_per_second=num_episodes / seconds, steps_per_second=steps / seconds))
+
+            # time-to-convergence: episodes and seconds until EarlyStopping ends training
+            def converge():
+                np.random.seed(seed)
+                environment = GolfEnvironment()
+                agent = Agent(environment, seed=seed)
+                early_stopping = EarlyStopping()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    monitor = getattr(Experiment(agent, environment), algorithm)(20000, early_stopping=early_stopping)
+                return monitor
+
+            monitor, seconds, peak = measure(converge, False)
+            records.append(_record('golf', f'{algorithm}_convergence', 20000, seconds, peak,
+                                   episodes_to_convergence=monitor.num_episodes,
+                                   seconds_to_convergence=float(monitor.wall_time[monitor.num_episodes - 1])))
+
+        # vectorized policy evaluation of the last learned Q-table
+        policy = greedy_policy(agent.q_table)
+        for num_episodes in sizes['golf_vector_eval']:
+            result, seconds, peak = measure(lambda: evaluate_policy(policy, num_episodes, seed=seed), memory)
+            records.append(_record('golf', 'vector_evaluate_policy', num_episodes, seconds, peak,
+                                   episodes_per_second=num_episodes / seconds,
+                                   steps_per_second=float(result['steps'].sum()) / seconds))
+    return records
+
+
+# square grid with about 20% obstacles and the goal in the bottom-left corner (like the example grid)
+def _random_grid_map(GridMap, side, seed):
+    rng = np.random.default_rng(seed)
+    codes = np.where(rng.random((side, side)) < 0.2, 1, 0).astype(np.uint8)
+    codes[-1, 0] = 2
+    return GridMap(codes)
+
+
+def bench_grid(sizes, seed, memory):
+    records = []
+    with project('grid'):
+        from bellman import compile_mdp
+        from grid_map import GridMap
+        from solvers import SOLVERS, solve
+        grid_main = load('grid')
+
+        for side in sizes['grid_solvers']:
+            grid_map = _random_grid_map(GridMap, side, seed)
+            mdp, compile_seconds, peak = measure(
+                lambda: compile_mdp(grid_map, grid_main.rewards, grid_main.actions, grid_main.transition_probs,
+                                    grid_main.discount_factor), memory)
+            records.append(_record('grid', 'compile_mdp', side * side, compile_seconds, peak))
+            for method in SOLVERS:
+                result, seconds, peak = measure(lambda: solve(mdp, method, grid_main.convergence_threshold), memory)
+                records.append(_record('grid', f'solve_{method}', side * side, seconds, peak,
+                                       backups_per_second=result.backups / result.seconds,
+                                       iterations=result.iterations, backups=result.backups,
+                                       seconds_to_convergence=result.seconds))
+    return records
+
+
+def bench_mc(sizes, seed, memory):
+    records = []
+    with project('monte_carlo'):
+        from batch_rollout import evaluate_policy
+        from main import actions, monte_carlo, rewards, states, transition_probs
+        from mc_learner import MonteCarloLearner, compile_environment
+
+        model = compile_environment(states, actions, rewards, transition_probs)
+        for num_episodes in sizes['mc_reference']:
+            def run_reference():
+                np.random.seed(seed)
+                return monte_carlo(1.0, num_episodes, 0.4)
+
+            result, seconds, peak = measure(run_reference, memory)
+            records.append(_record('monte_carlo', 'monte_carlo', num_episodes, seconds, peak,
+                                   episodes_per_second=num_episodes / seconds))
+        for num_episodes in sizes['mc_learner']:
+            learner, seconds, peak = measure(
+                lambda: MonteCarloLearner(model, 1.0, 0.4, rng=np.random.default_rng(seed)).run(num_episodes), memory)
+            records.append(_record('monte_carlo', 'incremental_learner', num_episodes, seconds, peak,
+                                   episodes_per_second=num_episodes / seconds,
+                                   steps_per_second=float(learner.counts.sum()) / seconds))
+        greedy = learner.policy
+        for num_episodes in sizes['mc_batch_eval']:
+            result, seconds, peak = measure(
+                lambda: evaluate_policy(model, greedy, 1.0, 0.4, num_episodes, rng=np.random.default_rng(seed)),
+                memory)
+            counts, q_values, mean_return, mean_length = result
+            records.append(_record('monte_carlo', 'batch_evaluate_policy', num_episodes, seconds, peak,
+                                   episodes_per_second=num_episodes / seconds,
+                                   steps_per_second=num_episodes * mean_length / seconds))
+    return records
+
+
+# modules whose cold-start import time is measured, (project, module) as in projects.load, None => NumPy alone
+IMPORT_TARGETS = [(None, None), ('bandit', 'q1.1/main'), ('bandit', 'bandit_engine'), ('golf', 'main'),
+                  ('golf', 'learners'), ('grid', 'main'), ('grid', 'planner'), ('monte_carlo', 'main')]
+
+
+# import time of every target in a fresh interpreter (import-only or headless jobs pay it on every start), and whether
+# the import pulled in matplotlib
+def bench_imports(sizes, seed, memory):
+    records = []
+    for name, module in IMPORT_TARGETS:
+        target = 'import numpy' if name is None else f"import projects; projects.load({name!r}, {module!r})"
+        code = (f"import sys, time; start = time.perf_counter(); {target}; "
+                "print(time.perf_counter() - start, 'matplotlib' in sys.modules)")
+        runs = []
+        for repeat in range(sizes['imports'][0]):
+            seconds, matplotlib_imported = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True,
+                                                          text=True, check=True).stdout.split()
+            runs.append(float(seconds))
+        records.append(_record('imports', 'numpy' if name is None else f'{name}:{module}', sizes['imports'][0],
+                               min(runs), None, matplotlib_imported=matplotlib_imported == 'True'))
+    return records
+
+
+BENCHMARKS = {
+    'bandit': bench_bandit,
+    'golf': bench_golf,
+    'grid': bench_grid,
+    'monte_carlo': bench_mc,
+    'imports': bench_imports,
+}
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True, text=True,
+                              timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_suite(projects=None, seed=0, quick=False, memory=True):
+    sizes = {name: values[:1] if quick else values for name, values in SIZES.items()}
+    results = []
+    for name in projects or list(BENCHMARKS):
+        results += BENCHMARKS[name](sizes, seed, memory)
+    return {
+        'metadata': {'commit': _git_commit(), 'python': platform.python_version(), 'numpy': np.__version__,
+                     'platform': platform.platform(), 'cpu_count': os.cpu_count(), 'seed': seed, 'quick': quick,
+                     'time': time.strftime('%Y-%m-%dT%H:%M:%S')},
+        'results': results,
+    }
+
+
+# throughput of every (project, benchmark, size) that dropped by more than tolerance compared with baseline
+def find_regressions(report, baseline, tolerance=0.2):
+    previous = {(r['project'], r['benchmark'], r['size']): r for r in baseline['results']}
+    regressions = []
+    for record in report['results']:
+        old = previous.get((record['project'], record['benchmark'], record['size']))
+        if old is None:
+            continue
+        for key in RATE_KEYS:
+            if record.get(key) and old.get(key) and record[key] < (1 - tolerance) * old[key]:
+                regressions.append({'project': record['project'], 'benchmark': record['benchmark'],
+                                    'size': record['size'], 'metric': key, 'baseline': old[key],
+                                    'current': record[key]})
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="benchmark suite of the bandit, golf, grid and Monte Carlo projects")
+    parser.add_argument('--projects', nargs='+', choices=list(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--quick', action='store_true', help="only the smallest problem size of every benchmark")
+    parser.add_argument('--no-memory', action='store_true', help="skip the tracemalloc peak-memory runs")
+    parser.add_argument('--out', default='benchmark_results.json')
+    parser.add_argument('--baseline', default=None, help="earlier results file to compare the throughput with")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="allowed relative throughput drop")
+    args = parser.parse_args()
+
+    report = run_suite(args.projects, args.seed, args.quick, not args.no_memory)
+    with open(args.out, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    for record in report['results']:
+        rates = '  '.join(f"{key.replace('_per_second', '')}/s {record[key]:,.0f}" for key in RATE_KEYS if key in record)
+        memory = f"  peak {record['peak_memory_bytes'] / 2 ** 20:.1f} MiB" if record['peak_memory_bytes'] else ''
+        if 'episodes_to_convergence' in record:
+            rates += f"converged after {record['episodes_to_convergence']} episodes"
+        if record.get('matplotlib_imported'):
+            rates += "imports matplotlib"
+        print(f"{record['project']:<12} {record['benchmark']:<32} size {record['size']:>8}  "
+              f"{record['seconds']:8.3f} s  {rates}{memory}")
+    print("results saved to", args.out)
+
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            regressions = find_regressions(report, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression['project']} {regression['benchmark']} size {regression['size']}: "
+                  f"{regression['metric']} {regression['baseline']:,.0f} -> {regression['current']:,.0f}")
+        sys.exit(1 if regressions else 0)
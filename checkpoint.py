@@ -0,0 +1,133 @@
+import json
+import os
+import random
+
+import numpy as np
+
+# checkpoints shared by all projects: named NumPy arrays (Q-tables, value functions, visit counts, ...) plus a JSON
+# metadata dict, which also carries the state of the random number generators so that training can resume exactly
+# path ending in '.npz' => one uncompressed .npz file
+# any other path => a directory with one .npy file per array and metadata.json, the arrays can be memory-mapped
+# version 2: the golf agent also saves its pre-drawn random numbers (random_uniforms, random_orders)
+CHECKPOINT_VERSION = 2
+_METADATA_KEY = '__metadata__'
+
+
+# state of a random number generator as JSON-compatible data: np.random.Generator, np.random.RandomState,
+# the global np.random stream (pass the np.random module), random.Random or the global random stream (the random module)
+def get_rng_state(rng):
+    if isinstance(rng, np.random.Generator):
+        return {'kind': 'generator', 'state': _to_json(rng.bit_generator.state)}
+    if isinstance(rng, np.random.RandomState) or rng is np.random:
+        return {'kind': 'random_state', 'state': _to_json(rng.get_state(legacy=False))}
+    if isinstance(rng, random.Random) or rng is random:
+        return {'kind': 'random', 'state': _to_json(rng.getstate())}
+    raise TypeError(f"unsupported random number generator {rng!r}")
+
+
+# restore a state from get_rng_state into rng (in place)
+def set_rng_state(rng, state):
+    value = _from_json(state['state'])
+    if state['kind'] == 'generator':
+        rng.bit_generator.state = value
+    elif state['kind'] == 'random_state':
+        rng.set_state(value)
+    elif state['kind'] == 'random':
+        version, internal_state, gauss_next = value
+        rng.setstate((version, tuple(internal_state), gauss_next))
+    else:
+        raise ValueError(f"unknown random number generator kind {state['kind']!r}")
+
+
+# save arrays (dict name => array) with metadata (JSON-compatible dict) and the states of rngs (dict name => rng)
+# the file is written under a temporary name first, so an interrupted save never destroys the previous checkpoint
+def save_checkpoint(path, arrays, metadata=None, rngs=None):
+    metadata = dict(metadata or {})
+    metadata['version'] = CHECKPOINT_VERSION
+    metadata['arrays'] = list(arrays)
+    if rngs:
+        metadata['rng_state'] = {name: get_rng_state(rng) for name, rng in rngs.items()}
+    encoded = json.dumps(_to_json(metadata))
+
+    if path.endswith('.npz'):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path + '.tmp', 'wb') as f:
+            np.savez(f, **{_METADATA_KEY: np.array(encoded)}, **arrays)
+        os.replace(path + '.tmp', path)
+    else:
+        os.makedirs(path, exist_ok=True)
+        for name, array in arrays.items():
+            file_path = os.path.join(path, name + '.npy')
+            with open(file_path + '.tmp', 'wb') as f:
+                np.save(f, np.asarray(array), allow_pickle=False)
+            os.replace(file_path + '.tmp', file_path)
+        # metadata.json is written last, it marks the checkpoint as complete
+        with open(os.path.join(path, 'metadata.json.tmp'), 'w') as f:
+            f.write(encoded)
+        os.replace(os.path.join(path, 'metadata.json.tmp'), os.path.join(path, 'metadata.json'))
+    return path
+
+
+# load a checkpoint, returns (arrays, metadata)
+# with mmap=True the arrays of a directory checkpoint are memory-mapped read-only instead of read into memory
+def load_checkpoint(path, mmap=False):
+    if path.endswith('.npz'):
+        with np.load(path, allow_pickle=False) as data:
+            metadata = json.loads(str(data[_METADATA_KEY]))
+            arrays = {name: data[name] for name in metadata['arrays']}
+    else:
+        with open(os.path.join(path, 'metadata.json')) as f:
+            metadata = json.load(f)
+        arrays = {name: np.load(os.path.join(path, name + '.npy'), mmap_mode='r' if mmap else None,
+                                allow_pickle=False) for name in metadata['arrays']}
+    if metadata.get('version', CHECKPOINT_VERSION) > CHECKPOINT_VERSION:
+        raise ValueError(f"checkpoint {path} was written by a newer version ({metadata['version']})")
+    return arrays, metadata
+
+
+# raise a ValueError if a checkpoint was trained with other parameters than expected (dict name => value), so that a
+# run never resumes a checkpoint of different settings
+def check_parameters(path, metadata, expected):
+    mismatched = [f"{name}={metadata.get(name)!r} (expected {value!r})" for name, value in _to_json(expected).items()
+                  if metadata.get(name) != value]
+    if mismatched:
+        raise ValueError(f"checkpoint {path} was trained with other parameters: {', '.join(mismatched)}")
+
+
+def checkpoint_exists(path):
+    return os.path.isfile(path) if path.endswith('.npz') else os.path.isfile(os.path.join(path, 'metadata.json'))
+
+
+# restore the random number generators saved with save_checkpoint (dict name => rng), names that were not saved are
+# left untouched
+def restore_rngs(metadata, rngs):
+    saved = metadata.get('rng_state', {})
+    for name, rng in rngs.items():
+        if name in saved:
+            set_rng_state(rng, saved[name])
+
+
+# ndarrays and tuples (e.g. inside RNG states) => JSON lists, ndarrays are tagged with their dtype, NumPy scalars
+# become Python numbers
+def _to_json(value):
+    if isinstance(value, np.ndarray):
+        return {'__ndarray__': value.tolist(), 'dtype': str(value.dtype)}
+    if isinstance(value, dict):
+        return {key: _to_json(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_json(item) for item in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _from_json(value):
+    if isinstance(value, dict):
+        if '__ndarray__' in value:
+            return np.array(value['__ndarray__'], dtype=value['dtype'])
+        return {key: _from_json(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_from_json(item) for item in value]
+    return value
@@ -0,0 +1,55 @@
+import argparse
+import contextlib
+import io
+import time
+
+import numpy as np
+
+from exploration import make_schedule
+from main import Agent, Experiment, GolfEnvironment
+from model_solver import compare_with_optimal, solve_q_star
+
+# schedules compared by default: name => (schedule, parameters)
+DEFAULT_SCHEDULES = {
+    'epsilon 0.1': ('epsilon-greedy', {'epsilon': 0.1}),
+    'epsilon 0.5 decaying': ('epsilon-greedy', {'epsilon': 0.5, 'decay': 0.999, 'min_epsilon': 0.01}),
+    'boltzmann': ('boltzmann', {'temperature': 5.0, 'decay': 0.999}),
+    'ucb': ('ucb', {'c': 2.0}),
+}
+
+
+# train one agent per seed with every schedule, the agent's generator and the environment's stream are both seeded,
+# so every run can be reproduced
+def compare(schedules, algorithm='run_q_learning', num_episodes=5000, seeds=(0, 1, 2), window=500):
+    q_star, num_of_iterations = solve_q_star()
+    results = {}
+    for label, (name, params) in schedules.items():
+        final_returns, agreements, seconds = [], [], []
+        for seed in seeds:
+            np.random.seed(seed)
+            environment = GolfEnvironment()
+            agent = Agent(environment, exploration=make_schedule(name, **params), seed=seed)
+            experiment = Experiment(agent, environment)
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                monitor = getattr(experiment, algorithm)(num_episodes)
+            seconds.append(time.perf_counter() - start)
+            final_returns.append(monitor.returns[num_episodes - window:num_episodes].mean())
+            agreements.append(compare_with_optimal(agent.q_table, q_star)['policy_agreement'])
+        results[label] = {'final_return': np.mean(final_returns), 'policy_agreement': np.mean(agreements),
+                          'episodes_per_second': num_episodes / np.mean(seconds)}
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="compare exploration schedules of the golf agent")
+    parser.add_argument('--algorithm', choices=['run_sarsa', 'run_q_learning'], default='run_q_learning')
+    parser.add_argument('--episodes', type=int, default=5000)
+    parser.add_argument('--seeds', type=int, nargs='+', default=[0, 1, 2])
+    parser.add_argument('--window', type=int, default=500, help="episodes averaged for the final return")
+    args = parser.parse_args()
+
+    results = compare(DEFAULT_SCHEDULES, args.algorithm, args.episodes, args.seeds, args.window)
+    for label, result in results.items():
+        print(f"{label:<22} final return {result['final_return']:7.2f}  "
+              f"policy agreement {result['policy_agreement']:.2f}  {result['episodes_per_second']:,.0f} episodes/s")
@@ -0,0 +1,148 @@
+import numpy as np
+
+
+# random numbers for action selection, generated block_size at a time from a single np.random.Generator
+# uniform() gives one number in [0, 1), tie_order() a random permutation of the actions used to break ties
+class RandomBlocks:
+    def __init__(self, rng, num_actions, block_size=4096):
+        self.rng = rng
+        self.num_actions = num_actions
+        self.block_size = block_size
+        self.uniforms = np.zeros(0)
+        self.orders = np.zeros((0, num_actions), dtype=np.int64)
+        self.uniform_pos = 0
+        self.order_pos = 0
+        self._uniform_list = []
+
+    def uniform(self):
+        if self.uniform_pos == len(self._uniform_list):
+            self.uniforms = self.rng.random(self.block_size)
+            self._uniform_list = self.uniforms.tolist()
+            self.uniform_pos = 0
+        u = self._uniform_list[self.uniform_pos]
+        self.uniform_pos += 1
+        return u
+
+    def tie_order(self):
+        if self.order_pos == len(self.orders):
+            identity = np.broadcast_to(np.arange(self.num_actions), (self.block_size, self.num_actions))
+            self.orders = self.rng.permuted(identity, axis=1)
+            self.order_pos = 0
+        order = self.orders[self.order_pos]
+        self.order_pos += 1
+        return order
+
+    # the unused part of both blocks, saved in checkpoints so that a resumed run draws the same numbers
+    def state(self):
+        return {'uniforms': self.uniforms[self.uniform_pos:len(self._uniform_list)],
+                'orders': self.orders[self.order_pos:]}
+
+    def set_state(self, state):
+        self.uniforms = np.array(state['uniforms'])
+        self._uniform_list = self.uniforms.tolist()
+        self.uniform_pos = 0
+        self.orders = np.array(state['orders'], dtype=np.int64).reshape(-1, self.num_actions)
+        self.order_pos = 0
+
+
+# index of the highest value, ties are broken uniformly at random: the first maximum in a random order of the actions
+def argmax_random_ties(values, order):
+    return int(order[np.argmax(values[order])])
+
+
+# probabilities of a uniform choice among the actions where mask is True
+def _uniform_over(mask):
+    return mask / np.count_nonzero(mask)
+
+
+# exploration schedules: set_episode(episode) updates the schedule before an episode,
+# select(q_values, counts, random_blocks) returns the index of the action to take in a state with these Q-values and
+# update counts, action_probabilities(q_values, counts) the probability select gives every action (Expected SARSA)
+
+# epsilon-greedy with epsilon = max(min_epsilon, epsilon * decay ** episode), decay=1 keeps epsilon fixed
+class EpsilonGreedy:
+    def __init__(self, epsilon=0.1, decay=1.0, min_epsilon=0.0):
+        self.epsilon = epsilon
+        self.decay = decay
+        self.min_epsilon = min_epsilon
+        self.current = epsilon
+
+    def set_episode(self, episode):
+        self.current = max(self.min_epsilon, self.epsilon * self.decay ** episode)
+
+    def select(self, q_values, counts, random_blocks):
+        if random_blocks.uniform() < self.current:
+            return int(random_blocks.uniform() * len(q_values))
+        return argmax_random_ties(q_values, random_blocks.tie_order())
+
+    def action_probabilities(self, q_values, counts):
+        return self.current / len(q_values) + (1 - self.current) * _uniform_over(q_values == q_values.max())
+
+
+# Boltzmann (softmax) exploration: P(a) ~ exp(Q(s, a) / temperature),
+# temperature = max(min_temperature, temperature * decay ** episode)
+class Boltzmann:
+    def __init__(self, temperature=5.0, decay=1.0, min_temperature=0.05):
+        self.temperature = temperature
+        self.decay = decay
+        self.min_temperature = min_temperature
+        self.current = temperature
+
+    def set_episode(self, episode):
+        self.current = max(self.min_temperature, self.temperature * self.decay ** episode)
+
+    def select(self, q_values, counts, random_blocks):
+        # shifting by the maximum keeps exp() from overflowing
+        cdf = np.cumsum(np.exp((q_values - q_values.max()) / self.current))
+        action = int(np.searchsorted(cdf, random_blocks.uniform() * cdf[-1], side='right'))
+        return min(action, len(q_values) - 1)
+
+    def action_probabilities(self, q_values, counts):
+        weights = np.exp((q_values - q_values.max()) / self.current)
+        return weights / weights.sum()
+
+
+# UCB exploration: Q(s, a) + c * sqrt(ln N(s) / N(s, a)) with the update counts of the state,
+# actions that were never taken in the state come first (in random order)
+class UCB:
+    def __init__(self, c=2.0):
+        self.c = c
+
+    def set_episode(self, episode):
+        pass
+
+    def select(self, q_values, counts, random_blocks):
+        untried = counts == 0
+        if untried.any():
+            return argmax_random_ties(untried, random_blocks.tie_order())
+        bonus = self.c * np.sqrt(np.log(counts.sum()) / counts)
+        return argmax_random_ties(q_values + bonus, random_blocks.tie_order())
+
+    def action_probabilities(self, q_values, counts):
+        untried = counts == 0
+        if untried.any():
+            return _uniform_over(untried)
+        scores = q_values + self.c * np.sqrt(np.log(counts.sum()) / counts)
+        return _uniform_over(scores == scores.max())
+
+
+SCHEDULES = {
+    'epsilon-greedy': EpsilonGreedy,
+    'boltzmann': Boltzmann,
+    'ucb': UCB,
+}
+
+
+# name and parameters of a schedule, e.g. {'name': 'epsilon-greedy', 'epsilon': 0.1, 'decay': 1.0, 'min_epsilon': 0.0}
+# (the class name for schedules that are not in SCHEDULES), saved in checkpoints
+def describe_schedule(schedule):
+    name = next((name for name, cls in SCHEDULES.items() if type(schedule) is cls), type(schedule).__name__)
+    params = {key: value for key, value in vars(schedule).items() if key != 'current'}
+    return {'name': name, **params}
+
+
+# exploration schedule by name, e.g. make_schedule('epsilon-greedy', epsilon=0.3, decay=0.9995)
+def make_schedule(name, **params):
+    if name not in SCHEDULES:
+        raise ValueError(f"unknown exploration schedule {name!r}, expected one of {list(SCHEDULES)}")
+    return SCHEDULES[name](**params)
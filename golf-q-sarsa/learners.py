@@ -0,0 +1,209 @@
+import argparse
+import contextlib
+import io
+import time
+
+import numpy as np
+
+from main import Agent, Experiment, GolfEnvironment
+from model_solver import compare_with_optimal, solve_q_star
+from monitor import TrainingMonitor
+
+
+# more TD learners with the Agent interface (actions, q_table, visit_counts, exploration, get_action_index, ...)
+# each one implements learn_episode(environment), which plays and learns one episode and returns
+# (total reward, steps, largest |delta Q|), so LearnerExperiment can run any of them like run_sarsa / run_q_learning
+
+
+# Expected SARSA: Q(S, A) <- Q(S, A) + alpha * [R + gamma * sum_a pi(a|S') Q(S', a) - Q(S, A)]
+# pi is the agent's own exploration policy, so the target has no sampling noise from the next action
+class ExpectedSarsaAgent(Agent):
+    def update_q_table_expected_sarsa(self, old_state, action, reward, new_state):
+        action = self.action_index[action]
+        return self._update(old_state, action, reward, new_state)
+
+    def _update(self, old_state, action, reward, new_state):
+        probabilities = self.exploration.action_probabilities(self.q_table[new_state], self.visit_counts[new_state])
+        expected_new_q_value = probabilities @ self.q_table[new_state]
+        old_q_value = self.q_table[old_state, action]
+        delta = self.alpha * (reward + self.gamma * expected_new_q_value - old_q_value)
+        self.q_table[old_state, action] = old_q_value + delta
+        self.visit_counts[old_state, action] += 1
+        return delta
+
+    def learn_episode(self, environment):
+        state = environment.reset()
+        done = False
+        steps = total_reward = 0
+        max_delta = 0.0
+        while not done:
+            action = self.get_action_index(state)
+            new_state, reward, done = environment.step(self.actions[action])
+            max_delta = max(max_delta, abs(self._update(state, action, reward, new_state)))
+            total_reward += reward
+            steps += 1
+            state = new_state
+        return total_reward, steps, max_delta
+
+
+# n-step SARSA (off_policy=False) or n-step Q-learning (off_policy=True, bootstraps from max_a Q(S_t+n, a) and does
+# not correct for the exploratory actions in between)
+# target: R_t+1 + gamma R_t+2 + ... + gamma^(n-1) R_t+n + gamma^n Q(S_t+n, A_t+n), truncated at the end of the episode
+class NStepAgent(Agent):
+    def __init__(self, environment, n=4, off_policy=False, **params):
+        super().__init__(environment, **params)
+        self.n = n
+        self.off_policy = off_policy
+        self.discounts = self.gamma ** np.arange(n + 1)
+
+    def learn_episode(self, environment):
+        n = self.n
+        q_table = self.q_table
+        states = [environment.reset()]
+        actions = [self.get_action_index(states[0])]
+        rewards = [0]  # rewards[i] is R_i, there is no R_0
+        T = float('inf')
+        max_delta = 0.0
+        t = 0
+        while True:
+            if t < T:
+                new_state, reward, done = environment.step(self.actions[actions[t]])
+                states.append(new_state)
+                rewards.append(reward)
+                if done:
+                    T = t + 1
+                else:
+                    actions.append(self.get_action_index(new_state))
+            tau = t - n + 1  # the step whose Q-value is updated now
+            if tau >= 0:
+                end = min(tau + n, T)
+                G = np.dot(self.discounts[:end - tau], rewards[tau + 1:end + 1])
+                if tau + n < T:
+                    bootstrap_state = states[tau + n]
+                    bootstrap = (q_table[bootstrap_state].max() if self.off_policy
+                                 else q_table[bootstrap_state, actions[tau + n]])
+                    G += self.discounts[n] * bootstrap
+                state, action = states[tau], actions[tau]
+                delta = self.alpha * (G - q_table[state, action])
+                q_table[state, action] += delta
+                self.visit_counts[state, action] += 1
+                max_delta = max(max_delta, abs(delta))
+                if tau == T - 1:
+                    break
+            t += 1
+        return sum(rewards), T, max_delta
+
+
+# SARSA(lambda) (off_policy=False) or Watkins's Q(lambda) (off_policy=True) with an eligibility trace array of the
+# Q-table's shape: every TD error updates all recently visited pairs at once, Q += alpha * delta * E
+# replacing traces (E(S, A) = 1 on a visit) by default, accumulating traces (E(S, A) += 1) with replacing=False
+# Q(lambda) clears the traces after an exploratory (non-greedy) action
+class EligibilityTraceAgent(Agent):
+    def __init__(self, environment, lam=0.8, off_policy=False, replacing=True, **params):
+        super().__init__(environment, **params)
+        self.lam = lam
+        self.off_policy = off_policy
+        self.replacing = replacing
+        self.traces = np.zeros(self.q_table.shape)
+
+    def learn_episode(self, environment):
+        q_table, traces = self.q_table, self.traces
+        traces.fill(0)
+        decay = self.gamma * self.lam
+        state = environment.reset()
+        action = self.get_action_index(state)
+        done = False
+        steps = total_reward = 0
+        max_delta = 0.0
+        while not done:
+            new_state, reward, done = environment.step(self.actions[action])
+            new_action = self.get_action_index(new_state)
+            if self.off_policy:
+                best_new_q_value = q_table[new_state].max()
+                greedy = q_table[new_state, new_action] == best_new_q_value
+                td_error = reward + self.gamma * best_new_q_value - q_table[state, action]
+            else:
+                td_error = reward + self.gamma * q_table[new_state, new_action] - q_table[state, action]
+            if self.replacing:
+                traces[state, action] = 1.0
+            else:
+                traces[state, action] += 1.0
+            q_table += (self.alpha * td_error) * traces
+            self.visit_counts[state, action] += 1
+            max_delta = max(max_delta, abs(self.alpha * td_error) * traces.max())
+            if self.off_policy and not greedy:
+                traces.fill(0)
+            else:
+                traces *= decay
+            total_reward += reward
+            steps += 1
+            state, action = new_state, new_action
+        return total_reward, steps, max_delta
+
+
+# Experiment for the agents above, run() records and stops like run_sarsa / run_q_learning
+class LearnerExperiment(Experiment):
+    def run(self, max_episodes=20000, monitor=None, early_stopping=None, name=None):
+        name = name or type(self.agent).__name__
+        monitor = monitor or TrainingMonitor(max_episodes)
+        monitor.start()
+        first_episode = monitor.num_episodes
+        for episode in range(max_episodes):
+            monitor.record(*self.agent.learn_episode(self.environment))
+            self.agent.end_episode()
+            if early_stopping is not None and early_stopping.should_stop(monitor):
+                print(f"{name} stopped early after {episode + 1} episodes")
+                break
+        curves = monitor.curves()
+        print(f"\nAverage reward for {name}: {np.mean(curves['returns'][first_episode:])}, "
+              f"Average steps: {np.mean(curves['steps'][first_episode:])}")
+        return monitor
+
+
+# learners compared by the benchmark: name => (agent class, experiment class, run method, agent parameters)
+LEARNERS = {
+    'sarsa': (Agent, Experiment, 'run_sarsa', {}),
+    'q-learning': (Agent, Experiment, 'run_q_learning', {}),
+    'expected-sarsa': (ExpectedSarsaAgent, LearnerExperiment, 'run', {}),
+    'n-step-sarsa': (NStepAgent, LearnerExperiment, 'run', {'n': 4}),
+    'n-step-q': (NStepAgent, LearnerExperiment, 'run', {'n': 4, 'off_policy': True}),
+    'sarsa-lambda': (EligibilityTraceAgent, LearnerExperiment, 'run', {'lam': 0.8}),
+    'q-lambda': (EligibilityTraceAgent, LearnerExperiment, 'run', {'lam': 0.8, 'off_policy': True}),
+}
+
+
+# train a learner in chunks of check_every episodes until the greedy policy of its Q-table is within value_loss_threshold
+# of the optimal one (mean over distances of V*(s) - Q*(s, greedy action), see compare_with_optimal)
+# returns the number of episodes (None if the threshold is not reached within max_episodes) and the wall time
+def episodes_to_threshold(name, q_star, value_loss_threshold=3.0, max_episodes=20000, check_every=250, seed=0):
+    agent_class, experiment_class, run_method, params = LEARNERS[name]
+    np.random.seed(seed)
+    environment = GolfEnvironment()
+    agent = agent_class(environment, seed=seed, **params)
+    run = getattr(experiment_class(agent, environment), run_method)
+    start = time.perf_counter()
+    for episodes in range(check_every, max_episodes + 1, check_every):
+        with contextlib.redirect_stdout(io.StringIO()):
+            run(check_every)
+        if compare_with_optimal(agent.q_table, q_star)['value_loss'] <= value_loss_threshold:
+            return episodes, time.perf_counter() - start
+    return None, time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="episodes (and wall time) each golf learner needs to reach a good policy")
+    parser.add_argument('--learners', nargs='+', choices=list(LEARNERS), default=list(LEARNERS))
+    parser.add_argument('--threshold', type=float, default=3.0, help="value loss of the greedy policy w.r.t. Q*")
+    parser.add_argument('--max-episodes', type=int, default=20000)
+    parser.add_argument('--check-every', type=int, default=250)
+    parser.add_argument('--seeds', type=int, nargs='+', default=[0, 1, 2])
+    args = parser.parse_args()
+
+    q_star, num_of_iterations = solve_q_star()
+    for name in args.learners:
+        results = [episodes_to_threshold(name, q_star, args.threshold, args.max_episodes, args.check_every, seed)
+                   for seed in args.seeds]
+        reached = [episodes for episodes, seconds in results if episodes is not None]
+        mean_episodes = f"{np.mean(reached):8.0f}" if reached else "       -"
+        print(f"{name:<15} episodes to threshold {mean_episodes} ({len(reached)}/{len(results)} runs reached it)  "
+              f"wall time {np.mean([seconds for episodes, seconds in results]):6.2f} s")
@@ -1,5 +1,15 @@
+import argparse
+import os
+import sys
+
 import numpy as np
-import random
+
+# the shared checkpoint module lives in the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from checkpoint import check_parameters, checkpoint_exists, load_checkpoint, restore_rngs, save_checkpoint
+from exploration import EpsilonGreedy, RandomBlocks, describe_schedule
+from monitor import EarlyStopping, TrainingMonitor
+from report import print_report, save_q_table
 
 
 # define environment Golf problem
@@ -53,54 +63,109 @@ class GolfEnvironment:
         return self.current_distance
 
 
+# agent's actions should include the type of club and the choice of power in the form of a tuple => (club-type,power-level)
+# (a new list in Q-table column order, for code that needs the actions without building an Agent)
+def golf_actions():
+    return [(club, round(power * 0.1, 1)) for club in ['woods', 'irons', 'hybrids', 'putter'] for power in range(10)]
+
+
 class Agent:
     # an agent is initialized with the number of possible actions, learning rate (alpha), discount factor (gamma), and the exploration rate (epsilon)
-    def __init__(self,environment, num_actions=4, alpha=0.5, gamma=0.9, epsilon=0.1):
+    # exploration is a schedule from exploration.py (default: epsilon-greedy with a fixed epsilon), all of the agent's
+    # random choices come from one np.random.Generator seeded with seed
+    def __init__(self,environment, num_actions=4, alpha=0.5, gamma=0.9, epsilon=0.1, exploration=None, seed=None):
         self.num_actions = num_actions
         self.alpha = alpha
         self.gamma = gamma
         self.epsilon = epsilon
         # agent's actions should include the type of club and the choice of power in the form of a tuple => (club-type,power-level)
-        self.actions = [(club, round(power * 0.1, 1)) for club in ['woods', 'irons', 'hybrids', 'putter'] for power in range(10)]
+        self.actions = golf_actions()
+        # integer encoding of the actions => column of each action in the Q-table
+        self.action_index = {action: i for i, action in enumerate(self.actions)}
 
         # Q-table for storing Q-values for each state-action pair
-        self.q_table = {(state, action): 0 for state in range(1, environment.initial_distance + 1) for action in self.actions}
-
-
+        # one row per distance (row 0 is the hole, a terminal state whose Q-values stay 0) and one column per action
+        self.q_table = np.zeros((environment.initial_distance + 1, len(self.actions)))
+        # number of updates of every state-action pair and number of training episodes so far
+        self.visit_counts = np.zeros(self.q_table.shape, dtype=np.int64)
+        self.episodes = 0
+
+        self.exploration = exploration or EpsilonGreedy(epsilon)
+        self.exploration.set_episode(self.episodes)
+        self.rng = np.random.default_rng(seed)
+        # pre-generated random numbers for action selection
+        self.random_blocks = RandomBlocks(self.rng, len(self.actions))
+
+    # function to choose an action with the exploration schedule, e.g. with epsilon-softpolicy: with a probability of epsilon, the agent will explore (choose a random action)
+    # otherwise, it will exploit (choose the action with the highest estimated Q-value, ties are broken randomly)
+    def get_action(self, state):
+        return self.actions[self.get_action_index(state)]
 
-        # function to choose an action with epsilon-softpolicy. with a probability of epsilon, the agent will explore (choose a random action)
-        # otherwise, it will exploit (choose the action with the highest estimated Q-value)
+    def get_action_index(self, state):
+        return self.exploration.select(self.q_table[state], self.visit_counts[state], self.random_blocks)
 
-    def get_action(self, state):
-        if random.uniform(0, 1) < self.epsilon:
-            action = random.choice(self.actions)
-        else:
-            q_values = [self.q_table.get((state, action), 0) for action in self.actions]
-            max_q_value = max(q_values)
-            count = q_values.count(max_q_value)
-            if count > 1:
-                best_actions = [i for i in range(len(self.actions)) if q_values[i] == max_q_value]
-                action = self.actions[np.random.choice(best_actions)]
-            else:
-                action = self.actions[np.argmax(q_values)]
-        return action
+    # called after every training episode, advances the exploration schedule
+    def end_episode(self):
+        self.episodes += 1
+        self.exploration.set_episode(self.episodes)
 
     # update_q_table_sarsa function updates the Q-value for the current state-action pair based on the SARSA update rule
     # SARSA update: Q(S, A) <- Q(S, A) + alpha * [R + gamma * Q(S', A') - Q(S, A)]
+    # both update functions return the change of Q(S, A)
     def update_q_table_sarsa(self, old_state, old_action, reward, new_state, new_action):
-            old_q_value = self.q_table.get((old_state, old_action), 0)
-            new_q_value = self.q_table.get((new_state, new_action), 0)
-            self.q_table[(old_state, old_action)] = old_q_value + self.alpha * (
-                    reward + self.gamma * new_q_value - old_q_value)
+        old_action = self.action_index[old_action]
+        old_q_value = self.q_table[old_state, old_action]
+        new_q_value = self.q_table[new_state, self.action_index[new_action]]
+        delta = self.alpha * (reward + self.gamma * new_q_value - old_q_value)
+        self.q_table[old_state, old_action] = old_q_value + delta
+        self.visit_counts[old_state, old_action] += 1
+        return delta
 
     # update Q-values based on the Q-learning algorithm
     # Q-learning update: Q(S, A) <- Q(S, A) + alpha * [R + gamma * max[Q(S', a)] - Q(S, A)]
     def update_q_table_q_learning(self, old_state, action, reward, new_state):
-        old_q_value = self.q_table.get((old_state, action), 0)
+        action = self.action_index[action]
+        old_q_value = self.q_table[old_state, action]
         # Q-Learning uses the maximum Q-value among new state's actions for the update, irrespective of the action chosen in the new state
-        max_new_q_value = max([self.q_table.get((new_state, a), 0) for a in self.actions])
-        self.q_table[(old_state, action)] = old_q_value + self.alpha * (
-                reward + self.gamma * max_new_q_value - old_q_value)
+        max_new_q_value = self.q_table[new_state].max()
+        delta = self.alpha * (reward + self.gamma * max_new_q_value - old_q_value)
+        self.q_table[old_state, action] = old_q_value + delta
+        self.visit_counts[old_state, action] += 1
+        return delta
+
+    # save the Q-table, visit counts, hyperparameters, the agent's generator (with its unused random numbers) and the
+    # global NumPy stream of the environment, so that training can continue exactly where it stopped
+    def save_checkpoint(self, path, algorithm=None):
+        metadata = {'algorithm': algorithm, 'episodes': self.episodes, 'alpha': self.alpha, 'gamma': self.gamma,
+                    'exploration': describe_schedule(self.exploration)}
+        blocks = self.random_blocks.state()
+        arrays = {'q_table': self.q_table, 'visit_counts': self.visit_counts,
+                  'random_uniforms': blocks['uniforms'], 'random_orders': blocks['orders']}
+        return save_checkpoint(path, arrays, metadata, rngs={'agent': self.rng, 'numpy': np.random})
+
+    # load a checkpoint written by save_checkpoint, restore_rng=False only loads the learned values (evaluation runs)
+    # a checkpoint trained with another alpha, gamma or exploration schedule raises a ValueError
+    # version 1 checkpoints have no pre-drawn random numbers and no state of the agent's generator, the agent then
+    # continues with its own generator and fresh blocks. They only saved epsilon, which is compared instead
+    def load_checkpoint(self, path, restore_rng=True):
+        arrays, metadata = load_checkpoint(path)
+        if arrays['q_table'].shape != self.q_table.shape:
+            raise ValueError(f"checkpoint Q-table has shape {arrays['q_table'].shape}, expected {self.q_table.shape}")
+        exploration = ({'exploration': describe_schedule(self.exploration)} if 'exploration' in metadata
+                       else {'epsilon': self.epsilon})
+        check_parameters(path, metadata, {'alpha': self.alpha, 'gamma': self.gamma, **exploration})
+        self.q_table = np.array(arrays['q_table'])
+        self.visit_counts = np.array(arrays['visit_counts'])
+        self.episodes = metadata['episodes']
+        self.exploration.set_episode(self.episodes)
+        if restore_rng:
+            restore_rngs(metadata, {'agent': self.rng, 'numpy': np.random})
+            if 'random_uniforms' in arrays:
+                self.random_blocks.set_state({'uniforms': arrays['random_uniforms'],
+                                              'orders': arrays['random_orders']})
+            else:
+                self.random_blocks.set_state({'uniforms': [], 'orders': []})
+        return metadata
 
 
 class Experiment:
@@ -108,37 +173,50 @@ class Experiment:
         self.agent = agent
         self.environment = environment
 
+    # both training functions record every episode in a TrainingMonitor (a new one unless monitor is given) and
+    # return it, early_stopping (an EarlyStopping) ends training before max_episodes once its criterion is met
     # function to run the SARSA algorithm
-    def run_sarsa(self, max_episodes=20000):
-        sarsa_scores = []
-        sarsa_steps = []
+    def run_sarsa(self, max_episodes=20000, monitor=None, early_stopping=None):
+        monitor = monitor or TrainingMonitor(max_episodes)
+        monitor.start()
+        first_episode = monitor.num_episodes
         for episode in range(max_episodes):
             state = self.environment.reset()
             action = self.agent.get_action(state)
             done = False
             steps = 0
             total_reward = 0
+            max_delta = 0.0
             while not done:
                 new_state, reward, done = self.environment.step(action)
                 new_action = self.agent.get_action(new_state)
                 total_reward += reward
                 steps += 1
                 # note: In SARSA, we use the new action chosen by following the current policy to update the Q-value
-                self.agent.update_q_table_sarsa(state, action, reward, new_state, new_action)
+                delta = self.agent.update_q_table_sarsa(state, action, reward, new_state, new_action)
+                max_delta = max(max_delta, abs(delta))
                 state = new_state
                 action = new_action
-            sarsa_scores.append(total_reward)
-            sarsa_steps.append(steps)
-        print(f"Average reward for SARSA: {np.mean(sarsa_scores)}, Average steps: {np.mean(sarsa_steps)}")
-
-    def run_q_learning(self, max_episodes=20000):
-        ql_scores = []
-        ql_steps = []
+            monitor.record(total_reward, steps, max_delta)
+            self.agent.end_episode()
+            if early_stopping is not None and early_stopping.should_stop(monitor):
+                print(f"SARSA stopped early after {episode + 1} episodes")
+                break
+        curves = monitor.curves()
+        print(f"Average reward for SARSA: {np.mean(curves['returns'][first_episode:])}, "
+              f"Average steps: {np.mean(curves['steps'][first_episode:])}")
+        return monitor
+
+    def run_q_learning(self, max_episodes=20000, monitor=None, early_stopping=None):
+        monitor = monitor or TrainingMonitor(max_episodes)
+        monitor.start()
+        first_episode = monitor.num_episodes
         for episode in range(max_episodes):
             state = self.environment.reset()
             done = False
             steps = 0
             total_reward = 0
+            max_delta = 0.0
             while not done:
                 # agent chooses an action based on the current state
                 action = self.agent.get_action(state)
@@ -147,51 +225,104 @@ class Experiment:
                 new_state, reward, done = self.environment.step(action)
                 total_reward += reward
                 steps += 1
-                self.agent.update_q_table_q_learning(state, action, reward, new_state)
+                delta = self.agent.update_q_table_q_learning(state, action, reward, new_state)
+                max_delta = max(max_delta, abs(delta))
                 # current state is updated to the new state
                 state = new_state
-            ql_scores.append(total_reward)
-            ql_steps.append(steps)
-        print(f"\nAverage reward for Q-learning: {np.mean(ql_scores)}, Average steps: {np.mean(ql_steps)}")
+            monitor.record(total_reward, steps, max_delta)
+            self.agent.end_episode()
+            if early_stopping is not None and early_stopping.should_stop(monitor):
+                print(f"Q-learning stopped early after {episode + 1} episodes")
+                break
+        curves = monitor.curves()
+        print(f"\nAverage reward for Q-learning: {np.mean(curves['returns'][first_episode:])}, "
+              f"Average steps: {np.mean(curves['steps'][first_episode:])}")
+        return monitor
 
     # print the optimal policy and Q-values
-    def print_policy_and_q_values(self):
-        optimal_policy = {}
-        for state_action, q_value in self.agent.q_table.items():
-            state, action = state_action
-            if state not in optimal_policy or optimal_policy[state][1] < q_value:
-                optimal_policy[state] = (action, q_value)
-
-        sorted_policy = sorted(optimal_policy.items(), key=lambda x: x[0],reverse=True)  # Sort policy by distance
-
-        print("Optimal Policy (State: [Action, Q-value]):")
-        for state, action_q_value in sorted_policy:
-            print(
-                f"Distance {state}: Club {action_q_value[0][0]}, Power Level {action_q_value[0][1]}, Q-value {action_q_value[1]}")
-
-        print("\n-------------------------------------------------------------\n")
-        print("\nState-Action Value Function:")
-        for state in range(1,self.environment.initial_distance + 1):
-            print(f"Distance {state}:")
-            for action in self.agent.actions:
-                q_value = self.agent.q_table.get((state, action), 0)
-                print(f"  Club {action[0]}, Power Level {action[1]}: Q-value {q_value}")
-
-
-
-# initialize environment and agent
-environment = GolfEnvironment()
-agent = Agent(environment)
-
-# run SARSA
-experiment = Experiment(agent, environment)
-experiment.run_sarsa()
-print("\nSARSA Results:")
-experiment.print_policy_and_q_values()
-
-# run q-learning
-agent = Agent(environment)
-experiment = Experiment(agent, environment)
-experiment.run_q_learning()
-print("\nQ-Learning Results:")
-experiment.print_policy_and_q_values()
+    # by default a compact summary (one line per run of distances with the same greedy action),
+    # full=True lists the greedy action of every distance and every state-action value
+    # path => also save the whole Q-table and visit counts (.npz or .csv)
+    def print_policy_and_q_values(self, full=False, path=None):
+        print_report(self.agent.q_table, self.agent.actions, full)
+        if path is not None:
+            save_q_table(path, self.agent.q_table, self.agent.actions, self.agent.visit_counts)
+
+
+# train agent with run (Experiment.run_sarsa or run_q_learning) up to max_episodes episodes in total
+# an existing checkpoint at checkpoint_path is loaded first and training resumes from it, the result is saved back
+# evaluate_only => only load the checkpoint, without training (a FileNotFoundError if there is none)
+# run_kwargs (e.g. early_stopping) are passed on to run, returns its TrainingMonitor (None without training)
+def train_with_checkpoint(agent, run, checkpoint_path=None, max_episodes=20000, evaluate_only=False, algorithm=None,
+                          **run_kwargs):
+    if evaluate_only and (checkpoint_path is None or not checkpoint_exists(checkpoint_path)):
+        raise FileNotFoundError(f"no checkpoint to evaluate at {checkpoint_path}" if checkpoint_path is not None
+                                else "evaluate_only needs a checkpoint_path")
+    if checkpoint_path is not None and checkpoint_exists(checkpoint_path):
+        agent.load_checkpoint(checkpoint_path, restore_rng=not evaluate_only)
+        print(f"Loaded {checkpoint_path} ({agent.episodes} episodes)")
+    remaining = max_episodes - agent.episodes
+    if evaluate_only or remaining <= 0:
+        return None
+    monitor = run(remaining, **run_kwargs)
+    if checkpoint_path is not None:
+        agent.save_checkpoint(checkpoint_path, algorithm)
+    return monitor
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="SARSA and Q-learning on the golf course")
+    parser.add_argument('--max-episodes', type=int, default=20000)
+    parser.add_argument('--alpha', type=float, default=0.5, help="learning rate")
+    parser.add_argument('--gamma', type=float, default=0.9, help="discount factor")
+    parser.add_argument('--epsilon', type=float, default=0.1, help="exploration rate of the soft policy")
+    parser.add_argument('--seed', type=int, default=None,
+                        help="seed of the global NumPy stream (environment) and of both agents' generators, "
+                             "a resumed checkpoint restores its saved generator states instead")
+    parser.add_argument('--checkpoint-dir', default=None,
+                        help="directory of the learned Q-tables, existing checkpoints are resumed")
+    parser.add_argument('--evaluate-only', action='store_true',
+                        help="only load the checkpoints and print the policies, without training")
+    parser.add_argument('--full-report', action='store_true',
+                        help="print every state-action value instead of the policy summary")
+    parser.add_argument('--report-dir', default=None,
+                        help="directory for the Q-tables as CSV files and the learning curves as .npz files")
+    parser.add_argument('--early-stopping', action='store_true',
+                        help="stop training once the moving average of the returns has flattened")
+    args = parser.parse_args()
+    if args.evaluate_only and args.checkpoint_dir is None:
+        parser.error("--evaluate-only needs --checkpoint-dir")
+
+    max_episodes, checkpoint_dir, evaluate_only = args.max_episodes, args.checkpoint_dir, args.evaluate_only
+    full_report, report_dir, early_stopping = args.full_report, args.report_dir, args.early_stopping
+    agent_params = {'alpha': args.alpha, 'gamma': args.gamma, 'epsilon': args.epsilon, 'seed': args.seed}
+    if args.seed is not None:
+        np.random.seed(args.seed)
+
+    # initialize environment and agent
+    environment = GolfEnvironment()
+    agent = Agent(environment, **agent_params)
+
+    # run SARSA
+    experiment = Experiment(agent, environment)
+    monitor = train_with_checkpoint(agent, experiment.run_sarsa,
+                                    os.path.join(checkpoint_dir, 'sarsa.npz') if checkpoint_dir else None,
+                                    max_episodes, evaluate_only, 'sarsa',
+                                    early_stopping=EarlyStopping() if early_stopping else None)
+    if monitor is not None and report_dir:
+        monitor.save(os.path.join(report_dir, 'sarsa_curve.npz'))
+    print("\nSARSA Results:")
+    experiment.print_policy_and_q_values(full_report, os.path.join(report_dir, 'sarsa.csv') if report_dir else None)
+
+    # run q-learning
+    agent = Agent(environment, **agent_params)
+    experiment = Experiment(agent, environment)
+    monitor = train_with_checkpoint(agent, experiment.run_q_learning,
+                                    os.path.join(checkpoint_dir, 'q_learning.npz') if checkpoint_dir else None,
+                                    max_episodes, evaluate_only, 'q_learning',
+                                    early_stopping=EarlyStopping() if early_stopping else None)
+    if monitor is not None and report_dir:
+        monitor.save(os.path.join(report_dir, 'q_learning_curve.npz'))
+    print("\nQ-Learning Results:")
+    experiment.print_policy_and_q_values(full_report,
+                                         os.path.join(report_dir, 'q_learning.csv') if report_dir else None)
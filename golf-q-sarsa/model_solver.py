@@ -0,0 +1,109 @@
+import contextlib
+import io
+import os
+import time
+
+import numpy as np
+
+from main import Agent, Experiment, GolfEnvironment, golf_actions
+
+# transition tensors already built in this process, keyed by (num_samples, seed)
+_tensor_cache = {}
+
+
+# P[s - 1, a, s'] = probability of moving from distance s (1..100) to distance s' (0..100) with action a
+# the precision and wind distributions are integrated by large-sample estimation: num_samples shots are drawn per action
+# and pushed through the exact GolfEnvironment.step formula for every start distance (the putter is deterministic)
+# the tensor is cached in memory and, if cache_path is given, in a .npz file
+def transition_tensor(num_samples=20000, seed=0, cache_path=None):
+    key = (num_samples, seed)
+    if key in _tensor_cache:
+        return _tensor_cache[key]
+    if cache_path is not None and os.path.exists(cache_path):
+        cached = np.load(cache_path)
+        if (int(cached['num_samples']), int(cached['seed'])) == key:
+            _tensor_cache[key] = cached['P']
+            return cached['P']
+
+    environment = GolfEnvironment()
+    actions = golf_actions()
+    num_states = environment.initial_distance
+    rng = np.random.default_rng(seed)
+    start = np.arange(1, num_states + 1)[:, None]
+    P = np.zeros((num_states, len(actions), num_states + 1))
+    for a, (club, power) in enumerate(actions):
+        club_stats = environment.clubs[club]
+        precision = club_stats['mean'] + club_stats['var'] * rng.standard_normal(num_samples)
+        wind_disturbance = 3 * rng.standard_normal(num_samples)
+        distance = (power * club_stats['defaultDistance'] * precision) + np.round((1 - precision) * wind_disturbance)
+        new_distance = np.minimum(100, np.abs(np.round(start - distance))).astype(np.int64)
+        # histogram of the next distance for every start distance in a single bincount
+        counts = np.bincount((new_distance + (num_states + 1) * np.arange(num_states)[:, None]).ravel(),
+                             minlength=num_states * (num_states + 1))
+        P[:, a, :] = counts.reshape(num_states, num_states + 1) / num_samples
+
+    _tensor_cache[key] = P
+    if cache_path is not None:
+        np.savez_compressed(cache_path, P=P, num_samples=num_samples, seed=seed)
+    return P
+
+
+# vectorized value iteration on the transition tensor
+# returns Q* with the same (distance, action) layout as Agent.q_table (row 0 is the hole and stays 0)
+def solve_q_star(P=None, gamma=0.9, convergence_threshold=1e-10):
+    P = transition_tensor() if P is None else P
+    num_states = P.shape[0]
+    # reward 100 for landing in the hole, -1 otherwise
+    expected_reward = 100 * P[:, :, 0] - (1 - P[:, :, 0])
+    V = np.zeros(num_states + 1)
+    num_of_iterations = 0
+    while True:
+        Q = expected_reward + gamma * (P @ V)
+        V_new = np.concatenate(([0.0], Q.max(axis=1)))
+        num_of_iterations += 1
+        if np.max(np.abs(V_new - V)) < convergence_threshold:
+            break
+        V = V_new
+    return np.vstack((np.zeros(P.shape[1]), Q)), num_of_iterations
+
+
+# how close a learned Q-table is to Q*
+# policy_agreement: share of distances whose greedy action is optimal (ties in Q* count as optimal)
+# value_loss: mean over distances of V*(s) - Q*(s, greedy action of the learned table)
+def compare_with_optimal(q_table, q_star):
+    learned = np.argmax(q_table[1:], axis=1)
+    optimal_values = q_star[1:].max(axis=1)
+    learned_values = q_star[1:][np.arange(len(learned)), learned]
+    return {
+        'policy_agreement': np.mean(np.isclose(learned_values, optimal_values)),
+        'value_loss': np.mean(optimal_values - learned_values),
+        'max_q_error': np.max(np.abs(q_table[1:] - q_star[1:])),
+    }
+
+
+if __name__ == '__main__':
+    start = time.perf_counter()
+    P = transition_tensor()
+    print(f"transition tensor {P.shape} built in {time.perf_counter() - start:.3f} s")
+    start = time.perf_counter()
+    q_star, num_of_iterations = solve_q_star(P)
+    print(f"Q* solved in {time.perf_counter() - start:.4f} s ({num_of_iterations} iterations)")
+
+    actions = golf_actions()
+    best_actions = np.argmax(q_star, axis=1)
+    for state in [100, 87, 52, 10, 3, 1]:
+        club, power = actions[best_actions[state]]
+        print(f"Distance {state}: Club {club}, Power Level {power}, Q* = {q_star[state, best_actions[state]]:.3f}")
+
+    # convergence of the TD learners towards Q*
+    for name in ['run_sarsa', 'run_q_learning']:
+        environment = GolfEnvironment()
+        agent = Agent(environment)
+        experiment = Experiment(agent, environment)
+        print(f"\n{name}:")
+        for episodes in range(2000, 20001, 2000):
+            with contextlib.redirect_stdout(io.StringIO()):
+                getattr(experiment, name)(max_episodes=2000)
+            result = compare_with_optimal(agent.q_table, q_star)
+            print(f"episodes {episodes}: policy agreement {result['policy_agreement']:.2f}, "
+                  f"value loss {result['value_loss']:.3f}, max |Q - Q*| {result['max_q_error']:.3f}")
@@ -0,0 +1,95 @@
+import os
+import time
+
+import numpy as np
+
+
+# learning curve of a training run, recorded into arrays preallocated for max_episodes episodes
+# per episode: total reward, steps, largest |delta Q| of any update and wall time since start() in seconds
+class TrainingMonitor:
+    def __init__(self, max_episodes):
+        self.returns = np.zeros(max_episodes)
+        self.steps = np.zeros(max_episodes, dtype=np.int64)
+        self.max_delta = np.zeros(max_episodes)
+        self.wall_time = np.zeros(max_episodes)
+        self.num_episodes = 0
+        self.start_time = None
+
+    def start(self):
+        if self.start_time is None:
+            self.start_time = time.perf_counter()
+
+    def record(self, total_reward, steps, max_delta):
+        i = self.num_episodes
+        if i == len(self.returns):
+            self._grow()
+        self.returns[i] = total_reward
+        self.steps[i] = steps
+        self.max_delta[i] = max_delta
+        self.wall_time[i] = time.perf_counter() - self.start_time
+        self.num_episodes = i + 1
+
+    # double the arrays when more episodes are recorded than were preallocated (e.g. one monitor for several runs)
+    def _grow(self):
+        size = max(1, 2 * len(self.returns))
+        for name in ('returns', 'steps', 'max_delta', 'wall_time'):
+            array = getattr(self, name)
+            grown = np.zeros(size, dtype=array.dtype)
+            grown[:len(array)] = array
+            setattr(self, name, grown)
+
+    # mean return of every window of consecutive episodes that has been recorded completely
+    def moving_average(self, window=500):
+        returns = self.returns[:self.num_episodes]
+        if len(returns) < window:
+            return np.zeros(0)
+        cumulative = np.concatenate(([0.0], np.cumsum(returns)))
+        return (cumulative[window:] - cumulative[:-window]) / window
+
+    # recorded part of the curves as a dict of arrays
+    def curves(self):
+        n = self.num_episodes
+        return {'returns': self.returns[:n], 'steps': self.steps[:n], 'max_delta': self.max_delta[:n],
+                'wall_time': self.wall_time[:n]}
+
+    def save(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        np.savez(path, **self.curves())
+
+
+# stops training once the learning curve has flattened, checked every check_every episodes after min_episodes
+# reward_tolerance: the mean return of the last window differs from the window before it by less than this
+# q_tolerance: no update of the last window changed a Q-value by more than this
+# the criterion that is set (or both) must hold for patience consecutive checks
+class EarlyStopping:
+    def __init__(self, window=1000, reward_tolerance=0.5, q_tolerance=None, min_episodes=2000, check_every=None,
+                 patience=3):
+        if reward_tolerance is None and q_tolerance is None:
+            raise ValueError("early stopping needs a reward_tolerance or a q_tolerance")
+        self.window = window
+        self.reward_tolerance = reward_tolerance
+        self.q_tolerance = q_tolerance
+        self.min_episodes = max(min_episodes, 2 * window)
+        self.check_every = check_every or window
+        self.patience = patience
+        self.passed = 0
+        self.stopped_at = None
+
+    def should_stop(self, monitor):
+        n = monitor.num_episodes
+        if n < self.min_episodes or n % self.check_every:
+            return False
+        converged = True
+        if self.reward_tolerance is not None:
+            last = monitor.returns[n - self.window:n].mean()
+            previous = monitor.returns[n - 2 * self.window:n - self.window].mean()
+            converged = abs(last - previous) < self.reward_tolerance
+        if self.q_tolerance is not None:
+            converged = converged and monitor.max_delta[n - self.window:n].max() < self.q_tolerance
+        self.passed = self.passed + 1 if converged else 0
+        if self.passed >= self.patience:
+            self.stopped_at = n
+            return True
+        return False
@@ -0,0 +1,118 @@
+import argparse
+import contextlib
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from main import Agent, Experiment, GolfEnvironment, golf_actions
+from model_solver import compare_with_optimal, solve_q_star
+
+
+# Q-table and visit counts in shared memory, so that several worker processes can train the same agent
+# the parent process creates the blocks (name=None), the workers attach to them by name
+class SharedQTable:
+    def __init__(self, shape, names=None):
+        self.shape = tuple(shape)
+        size = int(np.prod(self.shape)) * 8
+        if names is None:
+            self.blocks = [shared_memory.SharedMemory(create=True, size=size) for _ in range(2)]
+            self.owner = True
+        else:
+            self.blocks = [shared_memory.SharedMemory(name=name) for name in names]
+            self.owner = False
+        self.q_table = np.ndarray(self.shape, dtype=np.float64, buffer=self.blocks[0].buf)
+        self.visit_counts = np.ndarray(self.shape, dtype=np.int64, buffer=self.blocks[1].buf)
+        if self.owner:
+            self.q_table.fill(0)
+            self.visit_counts.fill(0)
+
+    def names(self):
+        return [block.name for block in self.blocks]
+
+    # drop the array views before closing (other views of the blocks must be gone too), the owner also frees the memory
+    def close(self):
+        self.q_table = self.visit_counts = None
+        for block in self.blocks:
+            block.close()
+            if self.owner:
+                block.unlink()
+
+
+# one worker: its own GolfEnvironment (the NumPy stream of this process) and Agent, whose Q-table and visit counts
+# are the shared arrays. Updates are written without a lock (Hogwild): a concurrent update of the same
+# state-action pair can be lost, which is rare with 101 x 40 pairs and does not stop Q-learning from converging
+# returns the worker's per-episode returns and steps
+def run_worker(job):
+    worker_index, names, shape, num_episodes, algorithm, base_seed, params = job
+    seed = np.random.SeedSequence(base_seed, spawn_key=(worker_index,))
+    environment_seed, agent_seed = seed.spawn(2)
+    np.random.seed(environment_seed.generate_state(1)[0])
+    shared = SharedQTable(shape, names)
+    agent = None
+    try:
+        environment = GolfEnvironment()
+        agent = Agent(environment, seed=agent_seed, **params)
+        agent.q_table, agent.visit_counts = shared.q_table, shared.visit_counts
+        experiment = Experiment(agent, environment)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            monitor = getattr(experiment, algorithm)(num_episodes)
+        seconds = time.perf_counter() - start
+        curves = monitor.curves()
+        return worker_index, curves['returns'].copy(), curves['steps'].copy(), seconds
+    finally:
+        # the agent's views of the shared blocks have to go before they are closed, also when training failed
+        if agent is not None:
+            agent.q_table = agent.visit_counts = None
+        shared.close()
+
+
+# train one shared Q-table with num_workers processes, num_episodes episodes in total split evenly between them
+# algorithm: 'run_q_learning' or 'run_sarsa', params: Agent parameters (alpha, gamma, epsilon, exploration)
+# returns the learned Q-table and visit counts, every worker's returns and steps, and the episodes/s of the whole run
+# (process start-up included)
+def train_parallel(num_workers, num_episodes=20000, algorithm='run_q_learning', base_seed=0, **params):
+    shape = (GolfEnvironment().initial_distance + 1, len(golf_actions()))
+    shared = SharedQTable(shape)
+    episodes = [num_episodes // num_workers + (worker < num_episodes % num_workers) for worker in range(num_workers)]
+    jobs = [(worker, shared.names(), shape, episodes[worker], algorithm, base_seed, params)
+            for worker in range(num_workers)]
+    returns, steps = [None] * num_workers, [None] * num_workers
+    try:
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=num_workers) as executor:
+            for worker, worker_returns, worker_steps, seconds in executor.map(run_worker, jobs):
+                returns[worker], steps[worker] = worker_returns, worker_steps
+        seconds = time.perf_counter() - start
+        q_table, visit_counts = shared.q_table.copy(), shared.visit_counts.copy()
+    finally:
+        shared.close()
+    all_returns = np.concatenate(returns)
+    all_steps = np.concatenate(steps)
+    return {'q_table': q_table, 'visit_counts': visit_counts, 'returns': returns, 'steps': steps,
+            'mean_return': all_returns.mean(), 'mean_steps': all_steps.mean(), 'seconds': seconds,
+            'episodes_per_second': len(all_returns) / seconds}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="scaling of shared-memory (Hogwild) golf training with the worker count")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--episodes', type=int, default=20000, help="episodes in total, split between the workers")
+    parser.add_argument('--algorithm', choices=['run_sarsa', 'run_q_learning'], default='run_q_learning')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    q_star, num_of_iterations = solve_q_star()
+    print(f"{os.cpu_count()} cores")
+    base_rate = None
+    for num_workers in args.workers:
+        results = train_parallel(num_workers, args.episodes, args.algorithm, args.seed)
+        quality = compare_with_optimal(results['q_table'], q_star)
+        base_rate = base_rate or results['episodes_per_second']
+        print(f"{num_workers} workers: {results['episodes_per_second']:8,.0f} episodes/s "
+              f"(x{results['episodes_per_second'] / base_rate:.2f})  mean return {results['mean_return']:6.2f}  "
+              f"policy agreement {quality['policy_agreement']:.2f}  value loss {quality['value_loss']:.2f}")
@@ -0,0 +1,93 @@
+import os
+import sys
+
+import numpy as np
+
+# rows of the Q-table written per call when it is saved as CSV
+CSV_CHUNK_ROWS = 10000
+
+
+# greedy policy of a Q-table in one pass: best action index (first one on ties) and its Q-value for every distance
+def greedy_actions(q_table):
+    best_actions = np.argmax(q_table, axis=1)
+    return best_actions, q_table[np.arange(len(q_table)), best_actions]
+
+
+# policy grouped into runs of consecutive distances with the same greedy action, longest distance first
+# => (first distance, last distance, action index, lowest Q-value, highest Q-value) per run
+def policy_segments(q_table):
+    best_actions, best_q = greedy_actions(q_table)
+    distances = np.arange(len(q_table) - 1, 0, -1)  # row 0 is the hole
+    actions, values = best_actions[distances], best_q[distances]
+    starts = np.flatnonzero(np.concatenate(([True], actions[1:] != actions[:-1])))
+    ends = np.concatenate((starts[1:], [len(distances)]))
+    return [(int(distances[start]), int(distances[end - 1]), int(actions[start]),
+             float(values[start:end].min()), float(values[start:end].max())) for start, end in zip(starts, ends)]
+
+
+# compact summary: one line per run of distances with the same greedy action
+def format_summary(q_table, actions):
+    lines = ["Greedy Policy (Distances: [Action, Q-value or range]):"]
+    for first, last, action, low, high in policy_segments(q_table):
+        club, power = actions[action]
+        if first == last:
+            lines.append(f"Distance {first}: Club {club}, Power Level {power}, Q-value {low:.3f}")
+        else:
+            lines.append(f"Distance {first}-{last}: Club {club}, Power Level {power}, Q-value {low:.3f} .. {high:.3f}")
+    return lines
+
+
+# the full listing: the greedy action of every distance, then every state-action value
+def format_full(q_table, actions):
+    best_actions, best_q = greedy_actions(q_table)
+    # Python floats print exactly like the scalars of the Q-table
+    q_rows = q_table.tolist()
+    best_q = best_q.tolist()
+    lines = ["Optimal Policy (State: [Action, Q-value]):"]
+    for state in range(len(q_table) - 1, 0, -1):  # Sort policy by distance
+        club, power = actions[best_actions[state]]
+        lines.append(f"Distance {state}: Club {club}, Power Level {power}, Q-value {best_q[state]}")
+    lines += ["\n-------------------------------------------------------------\n", "\nState-Action Value Function:"]
+    labels = [f"  Club {club}, Power Level {power}: Q-value " for club, power in actions]
+    for state in range(1, len(q_table)):
+        lines.append(f"Distance {state}:")
+        lines += [label + str(q_value) for label, q_value in zip(labels, q_rows[state])]
+    return lines
+
+
+# write the report to out in a single write, the summary by default or the full listing with full=True
+def print_report(q_table, actions, full=False, out=None):
+    lines = format_full(q_table, actions) if full else format_summary(q_table, actions)
+    (out or sys.stdout).write('\n'.join(lines) + '\n')
+
+
+# save the whole Q-table (and optionally the visit counts) for later analysis
+# .npz => the arrays plus the club and power of every column
+# anything else => CSV with one row per distance and one column per action, written in chunks of CSV_CHUNK_ROWS rows,
+# followed by one visits_<club>_<power> column per action when visit_counts is given
+def save_q_table(path, q_table, actions, visit_counts=None):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    clubs = np.array([club for club, power in actions])
+    powers = np.array([power for club, power in actions])
+    if path.endswith('.npz'):
+        arrays = {'q_table': q_table, 'clubs': clubs, 'powers': powers}
+        if visit_counts is not None:
+            arrays['visit_counts'] = visit_counts
+        np.savez(path, **arrays)
+        return
+    columns = [f"{club}_{power}" for club, power in actions]
+    fmt = ['%d'] + ['%.17g'] * len(actions)
+    if visit_counts is not None:
+        columns += [f"visits_{club}_{power}" for club, power in actions]
+        fmt += ['%d'] * len(actions)
+    header = ','.join(['distance'] + columns)
+    with open(path, 'w') as f:
+        f.write(header + '\n')
+        for start in range(0, len(q_table), CSV_CHUNK_ROWS):
+            rows = q_table[start:start + CSV_CHUNK_ROWS]
+            distances = np.arange(start, start + len(rows))
+            if visit_counts is not None:
+                rows = np.column_stack((rows, visit_counts[start:start + CSV_CHUNK_ROWS]))
+            np.savetxt(f, np.column_stack((distances, rows)), fmt=fmt, delimiter=',')
@@ -0,0 +1,91 @@
+import numpy as np
+
+from main import GolfEnvironment, golf_actions
+
+
+# batched version of GolfEnvironment: num_envs golfers play in lockstep
+# actions are integer indices into golf_actions() (= Agent.actions), finished episodes are reset automatically
+class VectorGolfEnvironment:
+    def __init__(self, num_envs, environment=None, seed=None):
+        environment = GolfEnvironment() if environment is None else environment
+        self.num_envs = num_envs
+        self.initial_distance = environment.initial_distance
+        self.actions = golf_actions()
+
+        # per-action club statistics, in the order of the actions
+        clubs = [environment.clubs[club] for club, power in self.actions]
+        self.power = np.array([power for club, power in self.actions])
+        self.default_distance = np.array([club['defaultDistance'] for club in clubs], dtype=float)
+        self.precision_mean = np.array([club['mean'] for club in clubs], dtype=float)
+        self.precision_std = np.array([club['var'] for club in clubs], dtype=float)
+
+        # seed can also be a np.random.Generator or a legacy np.random.RandomState
+        self.rng = seed if isinstance(seed, (np.random.Generator, np.random.RandomState)) else np.random.default_rng(seed)
+        self.reset()
+
+    def reset(self):
+        self.current_distance = np.full(self.num_envs, self.initial_distance, dtype=np.int64)
+        return self.current_distance.copy()
+
+    # same transition formula as GolfEnvironment.step, for all golfers at once
+    # returns the new states (0 for episodes that just finished), rewards and done flags
+    def step(self, actions):
+        # one draw for all golfers: row 0 => precision, row 1 => wind disturbance
+        noise = self.rng.standard_normal((2, self.num_envs))
+        precision = self.precision_mean[actions] + self.precision_std[actions] * noise[0]
+        wind_disturbance = 3 * noise[1]
+
+        distance = (self.power[actions] * self.default_distance[actions] * precision) + np.round(
+            (1 - precision) * wind_disturbance)
+        new_distance = np.minimum(100, np.abs(np.round(self.current_distance - distance))).astype(np.int64)
+
+        done = new_distance == 0
+        reward = np.where(done, 100, -1)
+
+        # finished golfers start a new episode from the initial distance
+        self.current_distance = np.where(done, self.initial_distance, new_distance)
+        return new_distance, reward, done
+
+
+# greedy policy of a Q-table => best action index of every distance
+def greedy_policy(q_table):
+    return np.argmax(q_table, axis=1)
+
+
+# estimate the value of a deterministic policy (action index per distance) from num_episodes rollouts
+# episodes longer than max_steps are cut off and counted as truncated
+def evaluate_policy(policy, num_episodes, num_envs=10000, max_steps=1000, seed=None):
+    policy = np.asarray(policy)
+    env = VectorGolfEnvironment(min(num_envs, num_episodes), seed=seed)
+    env.reset()
+    episode_return = np.zeros(env.num_envs)
+    episode_steps = np.zeros(env.num_envs, dtype=np.int64)
+    # golfers stop once num_episodes episodes have been started, so long episodes are not cut from the sample
+    active = np.ones(env.num_envs, dtype=bool)
+    num_started = env.num_envs
+    returns, steps = [], []
+    truncated = 0
+    while active.any():
+        # current_distance already holds the start state for golfers whose episode just ended
+        new_distance, reward, done = env.step(policy[env.current_distance])
+        episode_return += reward
+        episode_steps += 1
+        cut = active & ~done & (episode_steps >= max_steps)
+        if cut.any():
+            env.current_distance[cut] = env.initial_distance
+            truncated += cut.sum()
+        finished = active & (done | cut)
+        if finished.any():
+            returns.append(episode_return[finished])
+            steps.append(episode_steps[finished])
+            episode_return[finished] = 0
+            episode_steps[finished] = 0
+            # only as many golfers as there are episodes left start a new one
+            finished_index = np.flatnonzero(finished)
+            num_new = min(len(finished_index), num_episodes - num_started)
+            active[finished_index[num_new:]] = False
+            num_started += num_new
+    returns = np.concatenate(returns)
+    steps = np.concatenate(steps)
+    return {'mean_return': returns.mean(), 'mean_steps': steps.mean(), 'returns': returns, 'steps': steps,
+            'truncated': int(truncated)}
@@ -0,0 +1,101 @@
+import numpy as np
+
+from grid_map import GridMap
+
+
+# grid MDP compiled into flat arrays, so that every Bellman backup is a handful of whole-array NumPy operations
+# states are the grid cells in row-major order (s = i * cols + j)
+# every (state, action, transition entry) becomes one entry of the sparse transition arrays
+# grid can be a GridMap or a list of lists of 'O', 'X' and 'G'
+class CompiledMDP:
+    def __init__(self, grid, rewards, actions, transition_probs, discount_factor):
+        self.grid_map = grid if isinstance(grid, GridMap) else GridMap.from_grid(grid)
+        self.shape = self.grid_map.shape
+        self.num_states = self.grid_map.num_cells
+        self.num_actions = len(actions)
+        self.discount_factor = discount_factor
+
+        self.obstacle = self.grid_map.obstacle.ravel()
+        self.goal = self.grid_map.goal.ravel()
+        # reward for entering each cell (obstacles are never entered)
+        self.reward = self.grid_map.cell_values(rewards)
+
+        successors = self.grid_map.successors(actions)
+        self.valid = successors >= 0
+        entry_sa, entry_prob, entry_next = [], [], []
+        for k, action in enumerate(actions):
+            states = np.flatnonzero(self.valid[:, k])
+            # like the original loops, every entry of transition_probs[action] leads to the cell in the action's direction
+            for prob, next_state_idx in transition_probs[action]:
+                entry_sa.append(states * self.num_actions + k)
+                entry_prob.append(np.full(len(states), prob))
+                entry_next.append(successors[states, k].astype(np.int64))
+
+        # order the entries by (state, action) and keep the order of transition_probs inside each pair,
+        # so the summation order (and therefore every rounding) is the same as in the original loops
+        entry_sa = np.concatenate(entry_sa)
+        order = np.argsort(entry_sa, kind='stable')
+        self.entry_sa = entry_sa[order]
+        self.entry_prob = np.concatenate(entry_prob)[order]
+        self.entry_next = np.concatenate(entry_next)[order]
+        self.entry_state, self.entry_action = np.divmod(self.entry_sa, self.num_actions)
+        # entries of state s are entry_start[s]:entry_start[s + 1]
+        self.entry_start = np.searchsorted(self.entry_sa, np.arange(self.num_states + 1) * self.num_actions)
+
+        # predecessors of every state: pred_state[pred_start[s]:pred_start[s + 1]] can move into s, pred_weight is the
+        # largest total probability (over the actions) of that move, i.e. how much a change of V(s) can change Q(p, a)
+        pair = self.entry_sa * self.num_states + self.entry_next
+        pair, pair_index = np.unique(pair, return_inverse=True)
+        pair_prob = np.bincount(pair_index, weights=self.entry_prob)
+        pair_state = pair // self.num_states // self.num_actions
+        pair_next = pair % self.num_states
+        edge = pair_next * self.num_states + pair_state
+        order = np.lexsort((-pair_prob, edge))
+        edge, pair_prob = edge[order], pair_prob[order]
+        first = np.concatenate(([True], edge[1:] != edge[:-1]))
+        self.pred_state = (edge[first] % self.num_states)
+        self.pred_weight = pair_prob[first]
+        self.pred_start = np.searchsorted(edge[first] // self.num_states, np.arange(self.num_states + 1))
+
+    # Q(s, a) = sum over entries of prob * (reward(next) + gamma * V(next)), -inf for actions that are not allowed
+    def q_values(self, V):
+        V = V.ravel()
+        contributions = self.entry_prob * (self.reward[self.entry_next] + self.discount_factor * V[self.entry_next])
+        Q = np.bincount(self.entry_sa, weights=contributions, minlength=self.num_states * self.num_actions)
+        Q = Q.reshape(self.num_states, self.num_actions)
+        Q[~self.valid] = float('-inf')
+        return Q
+
+    # backed-up value max_a Q(s, a) of a single state (V is flat), -inf if the state has no allowed action
+    def state_value(self, V, s):
+        start, end = self.entry_start[s], self.entry_start[s + 1]
+        if start == end:
+            return float('-inf')
+        next_s = self.entry_next[start:end]
+        contributions = self.entry_prob[start:end] * (self.reward[next_s] + self.discount_factor * V[next_s])
+        Q = np.bincount(self.entry_action[start:end], weights=contributions, minlength=self.num_actions)
+        return Q[self.valid[s]].max()
+
+    # one synchronous (Jacobi) sweep over all cells, obstacles keep their value
+    def backup(self, V):
+        V_new = np.array(V, dtype=float).ravel()
+        V_new[~self.obstacle] = self.q_values(V).max(axis=1)[~self.obstacle]
+        return V_new.reshape(self.shape)
+
+    # index of the best action of every cell (first one on ties), -1 for obstacles, goals and cells without a move
+    def greedy_actions(self, V):
+        Q = self.q_values(V)
+        best = np.argmax(Q, axis=1)
+        best[self.obstacle | self.goal | (Q.max(axis=1) == float('-inf'))] = -1
+        return best.reshape(self.shape)
+
+
+def compile_mdp(grid, rewards, actions, transition_probs, discount_factor):
+    return CompiledMDP(grid, rewards, actions, transition_probs, discount_factor)
+
+
+# largest absolute change between two value functions (cells that stay at -inf count as unchanged)
+def max_change(V_new, V):
+    with np.errstate(invalid='ignore'):
+        return np.max(np.where(V_new == V, 0, np.abs(V_new - V)))
+
@@ -0,0 +1,116 @@
+import hashlib
+
+import numpy as np
+
+# cell types are stored as one byte per cell
+CELL_CODES = {'O': 0, 'X': 1, 'G': 2}
+CELL_TYPES = ['O', 'X', 'G']
+OPEN, OBSTACLE, GOAL = 0, 1, 2
+
+# byte value of a map character => cell code (255 for characters that are not cells)
+_BYTE_TO_CODE = np.full(256, 255, dtype=np.uint8)
+for _cell, _code in CELL_CODES.items():
+    _BYTE_TO_CODE[ord(_cell)] = _code
+
+
+# grid map stored as a (rows, cols) uint8 array of cell codes, without any per-cell Python objects
+# the successor index resolves boundaries and obstacles once, so solvers and the policy printer can share it
+class GridMap:
+    def __init__(self, codes):
+        self.codes = codes
+        self.shape = codes.shape
+        self.num_cells = codes.size
+        self._successors = {}
+
+    # grid given as a list of lists (or strings) of 'O', 'X' and 'G'
+    @classmethod
+    def from_grid(cls, grid):
+        return cls(_parse_lines([''.join(row) for row in grid]))
+
+    @property
+    def obstacle(self):
+        return self.codes == OBSTACLE
+
+    @property
+    def goal(self):
+        return self.codes == GOAL
+
+    # value of every cell (flat) from a {'O': ..., 'X': ..., 'G': ...} table, e.g. the rewards
+    def cell_values(self, table):
+        return np.array([table[cell] for cell in CELL_TYPES], dtype=float)[self.codes.ravel()]
+
+    # successor index: (num_cells, num_actions) flat index of the cell reached by each (row, col) move,
+    # -1 if the move leaves the grid, starts on an obstacle or runs into one
+    def successors(self, actions):
+        key = tuple(tuple(action) for action in actions)
+        if key not in self._successors:
+            rows, cols = self.shape
+            dtype = np.int32 if self.num_cells < 2 ** 31 else np.int64
+            index = np.arange(self.num_cells, dtype=dtype).reshape(self.shape)
+            free = self.codes != OBSTACLE
+            successors = np.full((self.num_cells, len(actions)), -1, dtype=dtype)
+            for k, (di, dj) in enumerate(actions):
+                # source and target windows of the shifted grid, so the bounds are resolved without per-cell checks
+                src_i = slice(max(0, -di), rows - max(0, di))
+                src_j = slice(max(0, -dj), cols - max(0, dj))
+                dst_i = slice(max(0, di), rows - max(0, -di))
+                dst_j = slice(max(0, dj), cols - max(0, -dj))
+                column = np.full(self.shape, -1, dtype=dtype)
+                allowed = free[src_i, src_j] & free[dst_i, dst_j]
+                column[src_i, src_j] = np.where(allowed, index[dst_i, dst_j], -1)
+                successors[:, k] = column.ravel()
+            self._successors[key] = successors
+        return self._successors[key]
+
+    # copy of the map with the (row, col) cells in cells set to cell ('O', 'X' or 'G'), e.g. a map edit
+    def with_cells(self, cells, cell):
+        codes = np.array(self.codes)
+        rows, cols = np.asarray(cells, dtype=np.int64).reshape(-1, 2).T
+        codes[rows, cols] = CELL_CODES[cell]
+        return GridMap(codes)
+
+    # hash of the shape and cells, identifies the map in saved value functions and caches
+    def digest(self):
+        h = hashlib.sha1(repr(self.shape).encode())
+        h.update(np.ascontiguousarray(self.codes).tobytes())
+        return h.hexdigest()
+
+    def save(self, path):
+        if path.endswith('.npy'):
+            np.save(path, self.codes)
+        else:
+            with open(path, 'w') as f:
+                for row in self.codes:
+                    f.write(''.join(CELL_TYPES[code] for code in row) + '\n')
+
+
+def _parse_lines(lines):
+    rows = [line.replace(' ', '').replace('\t', '').encode() for line in lines]
+    rows = [row for row in rows if row]
+    if len({len(row) for row in rows}) != 1:
+        raise ValueError("all rows of a grid map must have the same length")
+    codes = _BYTE_TO_CODE[np.frombuffer(b''.join(rows), dtype=np.uint8)].reshape(len(rows), len(rows[0]))
+    if np.any(codes == 255):
+        raise ValueError(f"grid maps may only contain the cells {CELL_TYPES}")
+    return codes
+
+
+# load a grid map from a text file (one row per line, cells optionally separated by spaces)
+# or from a .npy file of uint8 cell codes, which can be memory-mapped for very large maps
+# codes other than 0 ('O'), 1 ('X') and 2 ('G') raise a ValueError
+def load_map(path, mmap=False):
+    if path.endswith('.npy'):
+        codes = np.load(path, mmap_mode='r' if mmap else None)
+        if codes.dtype != np.uint8 or codes.ndim != 2:
+            raise ValueError("a .npy grid map must be a 2-D uint8 array of cell codes")
+        if codes.size and codes.max() > GOAL:
+            bad = np.unique(codes[codes > GOAL]).tolist()
+            raise ValueError(f"grid map {path} contains unknown cell codes {bad}, expected {CELL_CODES}")
+        return GridMap(codes)
+    with open(path) as f:
+        return GridMap(_parse_lines(f.read().splitlines()))
+
+
+# label of every cell's policy action, '-' for cells without one (best action -1)
+def policy_labels(best_actions, labels):
+    return np.asarray(list(labels) + ['-'])[best_actions]
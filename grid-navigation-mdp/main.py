@@ -1,5 +1,25 @@
+import argparse
+import os
+import sys
+
 import numpy as np
-import matplotlib.pyplot as plt
+
+from bellman import compile_mdp
+from grid_map import GridMap, load_map, policy_labels
+from solvers import SOLVERS, SolveResult, solve
+
+# the shared checkpoint module lives in the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from checkpoint import checkpoint_exists, load_checkpoint, save_checkpoint
+
+# grid map file (text or .npy), None => use the grid below
+map_file = None
+# solved value function (.npz file or directory), reused when the map and parameters match, None => always solve
+value_file = None
+# file for the value heat map (None => show it in a window)
+plot_file = None
+# maps with more cells get neither value labels in the heat map nor the printed policy grid
+max_labeled_cells = 400
 
 # grid
 grid = [
@@ -35,95 +55,112 @@ transition_probs = {
     (0, 1): [(0.8, 3), (0.2, 2)]       # right: [(probability, index of next state)]
 }
 
-# initialize value function => V
-rows = len(grid)
-cols = len(grid[0])
-V = np.zeros((rows, cols))
-
 convergence_threshold = 1e-6  # convergence threshold
 discount_factor = 0.9  # discount factor => gamma
-converged = False
-
-# value-iterative
-num_of_iterations = 0
-while not converged:
-    V_new = np.copy(V)
-    for i in range(rows):
-        for j in range(cols):
-            if grid[i][j] == 'G':
-                # G is terminal state
-                V_new[i][j] = 10
-            if grid[i][j] != 'X':  # exclude obstacles
-                max_value = float('-inf')
-                for action in actions:
-                    next_i = i + action[0]
-                    next_j = j + action[1]
-                    if 0 <= next_i < rows and 0 <= next_j < cols and grid[next_i][next_j] != 'X':
-                        values = []
-                        for prob, next_state_idx in transition_probs[action]:
-                            value = prob * (rewards[grid[next_i][next_j]] + discount_factor * V[next_i][next_j])
-                            values.append(value)
-                        action_value = sum(values)
-                        max_value = max(max_value, action_value)
-                V_new[i][j] = max_value
-    if np.max(np.abs(V_new - V)) < convergence_threshold:
-        converged = True
-    V = np.copy(V_new)
-    num_of_iterations += 1
-
-# G is terminal state
-V[rows-1][0] = 10
-
-# determine optimal policy
-policy = np.empty((rows, cols), dtype=str)
-for i in range(rows):
-    for j in range(cols):
-        if grid[i][j] != 'X' and grid[i][j] != 'G':
-            max_value = float('-inf')
-            best_action = None
-            for k, action in enumerate(actions):
-                next_i = i + action[0]
-                next_j = j + action[1]
-                if 0 <= next_i < rows and 0 <= next_j < cols and grid[next_i][next_j] != 'X':
-                    values = []
-                    for prob, next_state_idx in transition_probs[action]:
-                        value = prob * (rewards[grid[next_i][next_j]] + discount_factor * V[next_i][next_j])
-                        values.append(value)
-                    action_value = sum(values)
-                    if action_value > max_value:
-                        max_value = action_value
-                        best_action = k
-            if best_action is not None:
-                policy[i][j] = ['Up', 'Down', 'Left', 'Right'][best_action]
-            else:
-                policy[i][j] = '-'
-        else:
-            policy[i][j] = '-'
-
-# print optimal policy (for question1)
-print('optimal policy: ')
-for row in policy:
-    print(' '.join(row))
-
-print('\n**************************************************************\n')
-
-
-# visualize value matrix V (for question2)
-plt.imshow(V, cmap='coolwarm', interpolation='nearest')
-
-# add value labels to each state
-for i in range(rows):
-    for j in range(cols):
-        plt.text(j, i, f'{V[i][j]:.3f}', color='black', ha='center', va='center')
-
-plt.colorbar(label='Value')
-plt.title('state-values')
-plt.show()
-
-print('State-Value Function (V):')
-np.set_printoptions(suppress=True, precision=30, formatter={'float': '{:0.2e}'.format})
-print(V)
-
-print('\n**************************************************************\n')
-
-print('num_of_iterations: ', num_of_iterations)
\ No newline at end of file
+solver = 'jacobi'  # 'jacobi' (value iteration), 'gauss-seidel', 'prioritized' or 'policy-iteration'
+
+
+# value-iterative (or the saved value function of the same map and parameters)
+# compiles grid, actions and transition probabilities once, every sweep is then a whole-array backup
+# returns the SolveResult (V with the goal cells set to their terminal value 10) and the compiled MDP
+def solve_grid(grid_map, solver=solver, convergence_threshold=convergence_threshold,
+               discount_factor=discount_factor, value_file=None):
+    mdp = compile_mdp(grid_map, rewards, actions, transition_probs, discount_factor)
+    parameters = {'map': grid_map.digest(), 'rewards': repr(rewards), 'actions': repr(actions),
+                  'transition_probs': repr(transition_probs), 'discount_factor': discount_factor,
+                  'convergence_threshold': convergence_threshold}
+    saved = load_checkpoint(value_file) if value_file is not None and checkpoint_exists(value_file) else None
+    if saved is not None and saved[1]['parameters'] == parameters:
+        arrays, metadata = saved
+        result = SolveResult(np.array(arrays['V']), metadata['iterations'], metadata['backups'], metadata['seconds'])
+        print('loaded V from', value_file)
+    else:
+        result = solve(mdp, solver, convergence_threshold)
+        if value_file is not None:
+            save_checkpoint(value_file, {'V': result.V}, {'parameters': parameters, 'solver': solver,
+                                                          'iterations': result.iterations, 'backups': result.backups,
+                                                          'seconds': result.seconds})
+
+    # G is terminal state
+    result.V[grid_map.goal] = 10
+    return result, mdp
+
+
+# determine optimal policy (first letter of 'Up', 'Down', 'Left', 'Right')
+def optimal_policy(mdp, V):
+    return policy_labels(mdp.greedy_actions(V), ['U', 'D', 'L', 'R'])
+
+
+# visualize value matrix V, with the value of every state as a label (up to max_labels cells)
+# shown in a window, or drawn on a standalone Figure and saved to path (no pyplot, no GUI backend)
+def plot_values(V, path=None, max_labels=max_labeled_cells):
+    if path is None:
+        import matplotlib.pyplot as plt
+        figure = plt.gcf()
+    else:
+        from matplotlib.figure import Figure
+        figure = Figure()
+    axes = figure.gca()
+    image = axes.imshow(V, cmap='coolwarm', interpolation='nearest')
+
+    # add value labels to each state
+    rows, cols = V.shape
+    if V.size <= max_labels:
+        for i in range(rows):
+            for j in range(cols):
+                axes.text(j, i, f'{V[i][j]:.3f}', color='black', ha='center', va='center')
+
+    figure.colorbar(image, ax=axes, label='Value')
+    axes.set_title('state-values')
+    if path is None:
+        plt.show()
+    else:
+        figure.savefig(path)
+
+
+def main(grid_map, solver=solver, convergence_threshold=convergence_threshold, discount_factor=discount_factor,
+         value_file=None, plot_file=None, max_labels=max_labeled_cells):
+    result, mdp = solve_grid(grid_map, solver, convergence_threshold, discount_factor, value_file)
+    V = result.V
+    num_of_iterations = result.iterations
+    policy = optimal_policy(mdp, V)
+
+    # print optimal policy (for question1)
+    if V.size <= max_labels:
+        print('optimal policy: ')
+        for row in policy:
+            print(' '.join(row))
+    else:
+        print(f'optimal policy: not printed for a {V.shape[0]}x{V.shape[1]} map (more than {max_labels} cells)')
+
+    print('\n**************************************************************\n')
+
+    # visualize value matrix V (for question2)
+    plot_values(V, plot_file, max_labels)
+
+    print('State-Value Function (V):')
+    np.set_printoptions(suppress=True, precision=30, formatter={'float': '{:0.2e}'.format})
+    print(V)
+
+    print('\n**************************************************************\n')
+
+    print('num_of_iterations: ', num_of_iterations)
+    print('solver: ', solver, ' backups: ', result.backups, ' wall time: ', f'{result.seconds:.4f} s')
+    return result
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="value iteration for the robot's path to the charging station")
+    parser.add_argument('--map', default=map_file, help="grid map file (text or .npy), default: the grid above")
+    parser.add_argument('--solver', choices=list(SOLVERS), default=solver)
+    parser.add_argument('--threshold', type=float, default=convergence_threshold, help="convergence threshold")
+    parser.add_argument('--discount', type=float, default=discount_factor, help="discount factor gamma")
+    parser.add_argument('--value-file', default=value_file, help="saved V, reused when the map and parameters match")
+    parser.add_argument('--plot', default=plot_file, help="save the value heat map to this file instead of showing it")
+    parser.add_argument('--max-labeled-cells', type=int, default=max_labeled_cells,
+                        help="larger maps get no value labels in the heat map and no printed policy")
+    args = parser.parse_args()
+
+    # grid map with the precomputed successor index of every cell
+    grid_map = GridMap.from_grid(grid) if args.map is None else load_map(args.map, mmap=True)
+    main(grid_map, args.solver, args.threshold, args.discount, args.value_file, args.plot, args.max_labeled_cells)
@@ -0,0 +1,161 @@
+import argparse
+import hashlib
+import time
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+
+from bellman import compile_mdp, max_change
+from grid_map import GOAL, GridMap
+from solvers import SolveResult, _sweep_queue, solve
+
+# V: value function, best_actions: greedy action index of every cell (-1 for none, see CompiledMDP.greedy_actions),
+# source: 'cache', 'cold' (solved from zeros) or 'incremental' (warm-started from a cached map), result: the SolveResult
+# of the solve that produced V (of the first solve for cache hits)
+Plan = namedtuple('Plan', ['V', 'best_actions', 'source', 'result'])
+
+
+# grid planner for maps that change over time (cells flipping between 'O' and 'X')
+# solved value functions and policies are cached by the map digest and a hash of the parameters, the least recently
+# used entry is dropped once there are more than max_entries
+# a map that is not cached is solved incrementally from the most recently planned map of the same shape: V starts from
+# that map's solution and prioritized sweeping only backs up the cells around the edited ones, from where the
+# changes propagate as far as they are larger than the threshold (see _sweep_queue)
+class Planner:
+    def __init__(self, rewards, actions, transition_probs, discount_factor=0.9, convergence_threshold=1e-6,
+                 solver='jacobi', max_entries=16):
+        self.rewards = rewards
+        self.actions = actions
+        self.transition_probs = transition_probs
+        self.discount_factor = discount_factor
+        self.convergence_threshold = convergence_threshold
+        self.solver = solver
+        self.max_entries = max_entries
+        parameters = repr((rewards, actions, transition_probs, discount_factor, convergence_threshold))
+        self.parameter_digest = hashlib.sha1(parameters.encode()).hexdigest()
+        self._cache = OrderedDict()
+
+    def key(self, grid_map):
+        return grid_map.digest(), self.parameter_digest
+
+    # value function and policy of grid_map (a GridMap or a list of lists of 'O', 'X' and 'G')
+    # previous: the map the robot planned on before the edit (default: the most recently planned map), it is only
+    # used when it is still cached and has the same shape, incremental=False always solves from zeros
+    # the arrays of the returned Plan are shared with the cache and read-only
+    def plan(self, grid_map, previous=None, incremental=True):
+        grid_map = grid_map if isinstance(grid_map, GridMap) else GridMap.from_grid(grid_map)
+        key = self.key(grid_map)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            entry = self._cache[key]
+            return Plan(entry['V'], entry['best_actions'], 'cache', entry['result'])
+
+        base = None
+        if incremental:
+            base_key = self.key(previous) if previous is not None else next(reversed(self._cache), None)
+            base = self._cache.get(base_key)
+            if base is not None and base['grid_map'].shape != grid_map.shape:
+                base = None
+
+        mdp = compile_mdp(grid_map, self.rewards, self.actions, self.transition_probs, self.discount_factor)
+        if base is None:
+            result = solve(mdp, self.solver, self.convergence_threshold)
+            source = 'cold'
+        else:
+            result = self._replan(mdp, base)
+            source = 'incremental'
+
+        # like main.py, the policy treats the goal cells as terminal states with the goal reward as value
+        V_policy = np.array(result.V, dtype=float)
+        V_policy[grid_map.goal] = self.rewards['G']
+        best_actions = mdp.greedy_actions(V_policy)
+        V = np.array(result.V, dtype=float)
+        V.setflags(write=False)
+        best_actions.setflags(write=False)
+
+        self._cache[key] = {'grid_map': grid_map, 'V': V, 'best_actions': best_actions, 'result': result}
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+        return Plan(V, best_actions, source, result)
+
+    # warm start from the cached solution of base: newly blocked cells get the value obstacles have in a cold solve (0)
+    # and every cell whose moves, or whose successors' rewards, changed is queued with an infinite priority
+    def _replan(self, mdp, base):
+        start = time.perf_counter()
+        old_map = base['grid_map']
+        changed = (old_map.codes != mdp.grid_map.codes).ravel()
+        seeds = changed | (old_map.successors(self.actions) != mdp.grid_map.successors(self.actions)).any(axis=1)
+        for s in np.flatnonzero(changed):
+            seeds[mdp.pred_state[mdp.pred_start[s]:mdp.pred_start[s + 1]]] = True
+        seeds &= ~mdp.obstacle
+
+        V = np.array(base['V'], dtype=float).ravel()
+        V[mdp.obstacle] = 0
+        priority = np.where(seeds, float('inf'), 0.0)
+        V, iterations, backups = _sweep_queue(mdp, self.convergence_threshold, V, priority)
+        return SolveResult(V, iterations, backups, time.perf_counter() - start)
+
+    def __len__(self):
+        return len(self._cache)
+
+    def __contains__(self, grid_map):
+        return self.key(grid_map) in self._cache
+
+    def clear(self):
+        self._cache.clear()
+
+
+# random size x size map with the given share of obstacles and the goal in the bottom-left corner
+def random_map(size, obstacle_share=0.2, rng=None):
+    rng = np.random.default_rng(rng)
+    codes = (rng.random((size, size)) < obstacle_share).astype(np.uint8)
+    codes[-2:, :2] = 0
+    codes[-1, 0] = GOAL
+    return GridMap(codes)
+
+
+if __name__ == '__main__':
+    from main import actions, discount_factor, rewards, transition_probs
+
+    parser = argparse.ArgumentParser(description="re-plan latency after one-cell edits vs. a cold solve")
+    parser.add_argument('--size', type=int, default=200, help="rows and columns of the random map")
+    parser.add_argument('--obstacles', type=float, default=0.2, help="share of obstacle cells")
+    parser.add_argument('--edits', type=int, default=10, help="one-cell edits, each followed by a re-plan")
+    parser.add_argument('--solver', default='jacobi', help="solver of the cold solves")
+    parser.add_argument('--threshold', type=float, default=1e-6)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    grid_map = random_map(args.size, args.obstacles, rng)
+    planner = Planner(rewards, actions, transition_probs, discount_factor, args.threshold, args.solver)
+    plan = planner.plan(grid_map)
+    print(f"{args.size}x{args.size} map: cold solve {plan.result.seconds:.3f} s")
+
+    replan_seconds, cold_seconds = [], []
+    for edit in range(args.edits):
+        # flip one cell between 'O' and 'X', inside (or next to) the region the goal's value reaches
+        reached = np.isfinite(plan.V) & (plan.V > 1e-3)
+        near = reached.copy()
+        near[1:] |= reached[:-1]
+        near[:-1] |= reached[1:]
+        near[:, 1:] |= reached[:, :-1]
+        near[:, :-1] |= reached[:, 1:]
+        candidates = np.argwhere(near & ~grid_map.goal)
+        i, j = candidates[rng.integers(len(candidates))]
+        cell = 'O' if grid_map.obstacle[i, j] else 'X'
+        edited = grid_map.with_cells([(i, j)], cell)
+
+        start = time.perf_counter()
+        plan = planner.plan(edited)
+        replan_seconds.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        cold = Planner(rewards, actions, transition_probs, discount_factor, args.threshold, args.solver).plan(edited)
+        cold_seconds.append(time.perf_counter() - start)
+
+        print(f"edit {edit + 1}: ({i}, {j}) -> {cell}  re-plan {replan_seconds[-1]:.4f} s "
+              f"({plan.result.backups} backups)  cold {cold_seconds[-1]:.3f} s  "
+              f"max |V - V_cold| {max_change(plan.V, cold.V):.1e}")
+        grid_map = edited
+    print(f"mean re-plan latency {np.mean(replan_seconds):.4f} s = "
+          f"{np.mean(replan_seconds) / np.mean(cold_seconds):.1%} of a cold solve")
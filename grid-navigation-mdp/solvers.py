@@ -0,0 +1,203 @@
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from bellman import max_change
+
+# V: solved value function, iterations: sweeps (or vectorized batches for prioritized sweeping),
+# backups: single-state Bellman backups performed, seconds: wall time
+SolveResult = namedtuple('SolveResult', ['V', 'iterations', 'backups', 'seconds'])
+
+
+# synchronous (Jacobi) value iteration, every sweep backs up all cells from the previous V
+def jacobi(mdp, convergence_threshold, V=None):
+    V = np.zeros(mdp.shape) if V is None else np.array(V, dtype=float)
+    num_open = np.count_nonzero(~mdp.obstacle)
+    iterations = 0
+    converged = False
+    while not converged:
+        V_new = mdp.backup(V)
+        converged = max_change(V_new, V) < convergence_threshold
+        V = V_new
+        iterations += 1
+    return V, iterations, iterations * num_open
+
+
+# backups of one subset of states against the current V, used for the checkerboard Gauss-Seidel sweeps
+class _SubsetBackup:
+    def __init__(self, mdp, states):
+        self.mdp = mdp
+        self.states = states
+        entries = np.flatnonzero(np.isin(mdp.entry_state, states))
+        self.entry_prob = mdp.entry_prob[entries]
+        self.entry_next = mdp.entry_next[entries]
+        self.local_sa = np.searchsorted(states, mdp.entry_state[entries]) * mdp.num_actions + mdp.entry_action[entries]
+        self.invalid = ~mdp.valid[states]
+
+    def __call__(self, V):
+        mdp = self.mdp
+        contributions = self.entry_prob * (mdp.reward[self.entry_next] + mdp.discount_factor * V[self.entry_next])
+        Q = np.bincount(self.local_sa, weights=contributions, minlength=len(self.states) * mdp.num_actions)
+        Q = Q.reshape(len(self.states), mdp.num_actions)
+        Q[self.invalid] = float('-inf')
+        return Q.max(axis=1)
+
+
+# in-place Gauss-Seidel sweeps: the cells are split into the two colours of a checkerboard and each half is backed
+# up against the values the other half got earlier in the same sweep
+# (every move goes to a neighbouring cell of the other colour, so this is an exact in-place sweep)
+def gauss_seidel(mdp, convergence_threshold, V=None):
+    rows, cols = mdp.shape
+    i, j = np.divmod(np.arange(mdp.num_states), cols)
+    colour = (i + j) % 2
+    if np.any(colour[mdp.entry_state] == colour[mdp.entry_next]):
+        raise ValueError("checkerboard Gauss-Seidel needs every move to go to a neighbouring cell")
+    halves = [_SubsetBackup(mdp, np.flatnonzero(~mdp.obstacle & (colour == c))) for c in (0, 1)]
+
+    V = np.zeros(mdp.num_states) if V is None else np.array(V, dtype=float).ravel()
+    num_open = np.count_nonzero(~mdp.obstacle)
+    iterations = 0
+    converged = False
+    while not converged:
+        change = 0.0
+        for half in halves:
+            V_half = half(V)
+            change = max(change, max_change(V_half, V[half.states]) if len(half.states) else 0.0)
+            V[half.states] = V_half
+        converged = change < convergence_threshold
+        iterations += 1
+    return V.reshape(mdp.shape), iterations, iterations * num_open
+
+
+# absolute change of every state (states that stay at -inf count as unchanged)
+def max_change_per_state(V_new, V):
+    with np.errstate(invalid='ignore'):
+        return np.where(V_new == V, 0, np.abs(V_new - V))
+
+
+# prioritized sweeping: only cells whose successors changed are backed up, largest pending changes first
+# a cell's priority is an upper bound on its current Bellman error (the discounted, probability-weighted sum of its
+# successors' changes since its last backup), so stopping when every priority is below the threshold is safe
+def prioritized_sweeping(mdp, convergence_threshold, V=None, batch_ratio=0.25):
+    V = np.zeros(mdp.num_states) if V is None else np.array(V, dtype=float).ravel()
+    # initial priorities: the Bellman error of every cell
+    errors = np.where(mdp.obstacle, 0, max_change_per_state(mdp.backup(V).ravel(), V))
+    return _sweep_queue(mdp, convergence_threshold, V, errors, backups=np.count_nonzero(~mdp.obstacle),
+                        batch_ratio=batch_ratio)
+
+
+# positions start[rows[k]]:start[rows[k] + 1] of a CSR layout for every k, concatenated, and k of every position
+def _csr_positions(start, rows):
+    first, counts = start[rows], start[rows + 1] - start[rows]
+    owner = np.repeat(np.arange(len(rows)), counts)
+    return first[owner] + np.arange(len(owner)) - (np.cumsum(counts) - counts)[owner], owner
+
+
+# backed-up values max_a Q(s, a) of the (flat) states against V in one vectorized pass, -inf without an allowed action
+def _backup_states(mdp, V, states):
+    entries, owner = _csr_positions(mdp.entry_start, states)
+    next_s = mdp.entry_next[entries]
+    contributions = mdp.entry_prob[entries] * (mdp.reward[next_s] + mdp.discount_factor * V[next_s])
+    Q = np.bincount(owner * mdp.num_actions + mdp.entry_action[entries], weights=contributions,
+                    minlength=len(states) * mdp.num_actions).astype(float, copy=False)
+    Q = Q.reshape(len(states), mdp.num_actions)
+    Q[~mdp.valid[states]] = float('-inf')
+    return Q.max(axis=1)
+
+
+# process the pending cells until every priority is below the threshold
+# priority holds the initial priority of every (flat) state, V is updated in place
+# every iteration backs up, in one vectorized batch, all pending cells whose priority is at least batch_ratio times the
+# largest one (batch_ratio=1: only the cells of the largest priority, 0: every pending cell), then adds their changes
+# to the priorities of their predecessors
+def _sweep_queue(mdp, convergence_threshold, V, priority, backups=0, batch_ratio=0.25):
+    priority = np.array(priority, dtype=float)
+    pending = np.flatnonzero(priority >= convergence_threshold)
+    is_pending = np.zeros(mdp.num_states, dtype=bool)
+    is_pending[pending] = True
+    # last position of every state in the array of new pending states, to drop duplicates without sorting
+    last = np.zeros(mdp.num_states, dtype=np.int64)
+    iterations = 0
+    while len(pending):
+        pending_priority = priority[pending]
+        largest = pending_priority.max()
+        selected = pending_priority >= (batch_ratio * largest if batch_ratio > 0 else convergence_threshold)
+        batch, pending = pending[selected], pending[~selected]
+        is_pending[batch] = False
+        priority[batch] = 0
+        values = _backup_states(mdp, V, batch)
+        change = max_change_per_state(values, V[batch])
+        V[batch] = values
+        backups += len(batch)
+        iterations += 1
+
+        changed = change > 0
+        edges, owner = _csr_positions(mdp.pred_start, batch[changed])
+        predecessors = mdp.pred_state[edges]
+        np.add.at(priority, predecessors, mdp.discount_factor * mdp.pred_weight[edges] * change[changed][owner])
+        new = predecessors[(priority[predecessors] >= convergence_threshold) & ~is_pending[predecessors]]
+        positions = np.arange(len(new))
+        last[new] = positions
+        new = new[last[new] == positions]
+        is_pending[new] = True
+        pending = np.concatenate((pending, new))
+    return V.reshape(mdp.shape), iterations, backups
+
+
+# modified policy iteration: greedy improvement followed by sweeps of policy evaluation
+# the evaluation stops once a sweep changes V by less than evaluation_ratio times the change of the improvement (or
+# less than the threshold), after at most max_evaluation_sweeps sweeps
+# stops when a full Bellman backup changes V by less than the threshold
+def policy_iteration(mdp, convergence_threshold, V=None, max_evaluation_sweeps=100, evaluation_ratio=0.5):
+    V = np.zeros(mdp.num_states) if V is None else np.array(V, dtype=float).ravel()
+    open_states = ~mdp.obstacle
+    num_open = np.count_nonzero(open_states)
+    iterations = backups = 0
+    while True:
+        # improvement: greedy policy of the current V (this backup is also the convergence check)
+        Q = mdp.q_values(V)
+        V_new = np.where(open_states, Q.max(axis=1), V)
+        backups += num_open
+        iterations += 1
+        improvement = max_change(V_new, V)
+        V = V_new
+        if improvement < convergence_threshold:
+            break
+        policy = np.argmax(Q, axis=1)
+        tolerance = max(convergence_threshold, evaluation_ratio * improvement if evaluation_ratio > 0 else 0)
+
+        # evaluation: sweeps of the fixed policy, using only the transition entries of the chosen actions
+        entries = np.flatnonzero(mdp.entry_action == policy[mdp.entry_state])
+        entry_state = mdp.entry_state[entries]
+        entry_prob = mdp.entry_prob[entries]
+        entry_next = mdp.entry_next[entries]
+        # cells without an allowed action keep their value (-inf)
+        evaluated = open_states & mdp.valid.any(axis=1)
+        for sweep in range(max_evaluation_sweeps):
+            contributions = entry_prob * (mdp.reward[entry_next] + mdp.discount_factor * V[entry_next])
+            V_policy = np.bincount(entry_state, weights=contributions, minlength=mdp.num_states)
+            V_policy = np.where(evaluated, V_policy, V)
+            change = max_change(V_policy, V)
+            V = V_policy
+            backups += num_open
+            if change < tolerance:
+                break
+    return V.reshape(mdp.shape), iterations, backups
+
+
+SOLVERS = {
+    'jacobi': jacobi,
+    'gauss-seidel': gauss_seidel,
+    'prioritized': prioritized_sweeping,
+    'policy-iteration': policy_iteration,
+}
+
+
+# solve the compiled MDP with one of the SOLVERS, optionally warm-started from V
+def solve(mdp, method='jacobi', convergence_threshold=1e-6, V=None):
+    if method not in SOLVERS:
+        raise ValueError(f"unknown solver {method!r}, expected one of {list(SOLVERS)}")
+    start = time.perf_counter()
+    V, iterations, backups = SOLVERS[method](mdp, convergence_threshold, V)
+    return SolveResult(V, iterations, backups, time.perf_counter() - start)
@@ -0,0 +1,64 @@
+import contextlib
+import importlib
+import importlib.util
+import os
+import sys
+
+# the four projects as a library: their folders are not valid package names and every one of them has its own
+# main.py, so their modules are loaded through load() instead of a package import, e.g.
+#   Agent = load('golf').Agent                     golf-q-sarsa/main.py
+#   Planner = load('grid', 'planner').Planner     grid-navigation-mdp/planner.py
+#   DiceNumber = load('bandit', 'q1.3/main').DiceNumber
+# importing a module only defines it: training, solving and plotting run from the command line (python main.py)
+ROOT = os.path.dirname(os.path.abspath(__file__))
+PROJECTS = {
+    'bandit': 'K-armed Bandit',
+    'golf': 'golf-q-sarsa',
+    'grid': 'grid-navigation-mdp',
+    'monte_carlo': 'soft-monte-carlo-pathfinding',
+}
+# (project, module) => loaded module
+_loaded = {}
+
+
+# import a project's modules with its folder first on sys.path and its own main.py as 'main' (the one loaded before,
+# if any), 'main' is restored afterwards (the modules imported inside keep their references)
+@contextlib.contextmanager
+def project(name):
+    path = os.path.join(ROOT, PROJECTS[name])
+    saved = sys.modules.pop('main', None)
+    if (name, 'main') in _loaded:
+        sys.modules['main'] = _loaded[name, 'main']
+    sys.path.insert(0, path)
+    try:
+        yield
+    finally:
+        sys.path.remove(path)
+        main = sys.modules.pop('main', None)
+        if main is not None:
+            _loaded.setdefault((name, 'main'), main)
+        if saved is not None:
+            sys.modules['main'] = saved
+
+
+# module of a project, module is a module name ('main', 'planner', ...) or the path of a script in a subfolder
+# without '.py' ('q1.1/main'), which gets its own module name (bandit_q1_1_main)
+def load(name, module='main'):
+    if name not in PROJECTS:
+        raise ValueError(f"unknown project {name!r}, expected one of {list(PROJECTS)}")
+    if (name, module) not in _loaded:
+        with project(name):
+            if '/' in module:
+                module_name = f"{name}_{module.replace('/', '_').replace('.', '_')}"
+                _loaded[name, module] = _load_script(os.path.join(ROOT, PROJECTS[name], module + '.py'), module_name)
+            else:
+                _loaded[name, module] = importlib.import_module(module)
+    return _loaded[name, module]
+
+
+def _load_script(path, name):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
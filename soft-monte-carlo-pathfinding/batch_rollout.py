@@ -0,0 +1,163 @@
+import argparse
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from mc_learner import MonteCarloLearner
+
+# a batch of episodes in step-major order: entry k is step step[k] of episode episode[k]
+# (all episodes' first steps, then all second steps, ...), ret[k] is the discounted return from that step on and
+# first[k] marks the first visit of (state, action) in its episode
+# returns holds the return of every episode from its start state, lengths its number of steps and truncated
+# the episodes cut off by max_steps
+Rollout = namedtuple('Rollout', ['episode', 'step', 'state', 'action', 'reward', 'ret', 'first',
+                                 'returns', 'lengths', 'truncated'])
+
+
+# simulates many episodes of a ChainModel at once: every step advances all unfinished episodes with a few array
+# operations, finished episodes are masked out
+class BatchSampler:
+    def __init__(self, model, epsilon, rng=None):
+        self.model = model
+        self.epsilon = epsilon
+        self.rng = np.random if rng is None else rng
+        self.terminal = np.array(model.terminal)
+        self.reward = np.array(model.reward)
+
+        # dense (state, action, outcome) tables of next states and cumulative probabilities,
+        # unused outcomes have probability 0 (cdf = inf) and are never chosen
+        num_outcomes = max(1, max(len(outcomes) for row in model.next_states for outcomes in row))
+        self.next_states = np.zeros((model.num_states, model.num_actions, num_outcomes), dtype=np.int64)
+        self.next_cdf = np.full((model.num_states, model.num_actions, num_outcomes), np.inf)
+        for s in range(model.num_states):
+            for a in range(model.num_actions):
+                n = len(model.next_states[s][a])
+                self.next_states[s, a, :n] = model.next_states[s][a]
+                self.next_cdf[s, a, :n] = model.next_cdf[s][a]
+                self.next_cdf[s, a, n - 1:n] = np.inf  # the last outcome takes everything left
+        # (greedy action, action) cumulative probabilities of the soft policy
+        self.action_cdfs = np.array(model.soft_policy_cdfs(epsilon))
+        self.action_cdfs[:, -1] = np.inf
+
+    # run num_episodes episodes from the start state under the soft policy around greedy
+    # (greedy action of every state, e.g. MonteCarloLearner.policy)
+    def rollout(self, greedy, num_episodes, gamma=1.0, first_visit=True, max_steps=10000):
+        model = self.model
+        greedy = np.maximum(np.asarray(greedy), 0)
+        policy_cdfs = self.action_cdfs[greedy]
+        ids = np.arange(num_episodes)
+        state = np.full(num_episodes, model.start)
+        visited = np.zeros((num_episodes, model.num_states * model.num_actions), dtype=bool) if first_visit else None
+        steps = []
+        for t in range(max_steps):
+            active = ~self.terminal[state]
+            ids, state = ids[active], state[active]
+            if not len(ids):
+                break
+            u = self.rng.random((2, len(ids)))
+            action = np.sum(policy_cdfs[state] <= u[0][:, None], axis=1)
+            outcome = np.sum(self.next_cdf[state, action] <= u[1][:, None], axis=1)
+            next_state = self.next_states[state, action, outcome]
+            if first_visit:
+                sa = state * model.num_actions + action
+                first = ~visited[ids, sa]
+                visited[ids, sa] = True
+            else:
+                first = np.ones(len(ids), dtype=bool)
+            steps.append((ids, np.full(len(ids), t), state, action, self.reward[next_state], first))
+            state = next_state
+
+        # episodes that reached a terminal state on the last step are finished, not cut off
+        ids = ids[~self.terminal[state]]
+        lengths = np.zeros(num_episodes, dtype=np.int64)
+        truncated = np.zeros(num_episodes, dtype=bool)
+        truncated[ids] = True
+        # discounted returns, computed backwards one step (i.e. one slice of all episodes) at a time
+        G = np.zeros(num_episodes)
+        rets = []
+        for ids_t, t, state_t, action_t, reward_t, first_t in reversed(steps):
+            G[ids_t] = gamma * G[ids_t] + reward_t
+            rets.append(G[ids_t])
+            lengths[ids_t] = np.maximum(lengths[ids_t], t + 1)
+        rets.reverse()
+        if not steps:
+            empty = np.zeros(0, dtype=np.int64)
+            return Rollout(empty, empty, empty, empty, np.zeros(0), np.zeros(0), np.zeros(0, dtype=bool),
+                           G, lengths, truncated)
+        columns = [np.concatenate(column) for column in zip(*steps)]
+        return Rollout(*columns[:5], np.concatenate(rets), columns[5], G, lengths, truncated)
+
+
+# add the returns of a rollout to (n_states, n_actions) count and mean arrays in place
+# every entry is used unless only_first is set, then only the first visits count
+def accumulate(counts, q_values, rollout, only_first=True):
+    use = rollout.first if only_first else slice(None)
+    sa = rollout.state[use] * counts.shape[1] + rollout.action[use]
+    batch_counts = np.bincount(sa, minlength=counts.size).reshape(counts.shape)
+    batch_sums = np.bincount(sa, weights=rollout.ret[use], minlength=counts.size).reshape(counts.shape)
+    counts += batch_counts
+    seen = counts > 0
+    q_values[seen] += (batch_sums[seen] - batch_counts[seen] * q_values[seen]) / counts[seen]
+    return counts, q_values
+
+
+# first-visit Monte Carlo evaluation of the soft policy around greedy over num_episodes episodes,
+# simulated batch_size episodes at a time so memory stays bounded
+# returns the visit counts, Q-values, mean return from the start state and mean episode length
+def evaluate_policy(model, greedy, gamma, epsilon, num_episodes=10 ** 6, batch_size=100000, first_visit=True,
+                    rng=None):
+    sampler = BatchSampler(model, epsilon, rng)
+    counts = np.zeros((model.num_states, model.num_actions), dtype=np.int64)
+    q_values = np.zeros((model.num_states, model.num_actions))
+    total_return = total_length = 0.0
+    for start in range(0, num_episodes, batch_size):
+        rollout = sampler.rollout(greedy, min(batch_size, num_episodes - start), gamma, first_visit)
+        accumulate(counts, q_values, rollout, first_visit)
+        total_return += rollout.returns.sum()
+        total_length += rollout.lengths.sum()
+    return counts, q_values, total_return / num_episodes, total_length / num_episodes
+
+
+# Monte Carlo control in batches: every batch of episodes follows the soft policy of the current Q-values, then all of
+# its returns are added at once and the greedy policy is updated
+# with batch_size=1 this is the same algorithm as MonteCarloLearner (but not the same random stream)
+def batched_monte_carlo(model, gamma, num_episodes, epsilon, batch_size=1000, first_visit=False, rng=None):
+    learner = MonteCarloLearner(model, gamma, epsilon, first_visit, rng)
+    sampler = BatchSampler(model, epsilon, learner.rng)
+    learner.greedy = np.zeros(model.num_states, dtype=np.int64)
+    for start in range(0, num_episodes, batch_size):
+        rollout = sampler.rollout(learner.greedy, min(batch_size, num_episodes - start), gamma, first_visit)
+        accumulate(learner.counts, learner.q_values, rollout, first_visit)
+        updated = np.unique(rollout.state)
+        learner.greedy[updated] = np.argmax(learner.q_values[updated], axis=1)
+        learner.policy[updated] = learner.greedy[updated]
+    return learner
+
+
+if __name__ == '__main__':
+    from main import actions, rewards, states, transition_probs
+    from mc_learner import compile_environment
+
+    parser = argparse.ArgumentParser(description="evaluate a soft policy of the chain environment over many episodes")
+    parser.add_argument('--gamma', type=float, default=1.0)
+    parser.add_argument('--epsilon', type=float, default=0.2)
+    parser.add_argument('--episodes', type=int, default=10 ** 6)
+    parser.add_argument('--batch-size', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    model = compile_environment(states, actions, rewards, transition_probs)
+    rng = np.random.default_rng(args.seed)
+    learner = batched_monte_carlo(model, args.gamma, 10000, args.epsilon, batch_size=100, rng=rng)
+    print("learned policy:", learner.policy_dict())
+
+    start = time.perf_counter()
+    counts, q_values, mean_return, mean_length = evaluate_policy(model, learner.policy, args.gamma, args.epsilon,
+                                                                 args.episodes, args.batch_size, rng=rng)
+    seconds = time.perf_counter() - start
+    for s, state in enumerate(states):
+        if not model.terminal[s]:
+            print(f"{state:<6}" + "  ".join(f"Q({action}) = {q_values[s, a]:8.4f}" for a, action in enumerate(actions)))
+    print(f"mean return {mean_return:.4f}, mean length {mean_length:.2f} steps")
+    print(f"{args.episodes} episodes in {seconds:.2f} s ({args.episodes / seconds:,.0f} episodes/s)")
@@ -0,0 +1,35 @@
+import time
+
+import numpy as np
+
+from main import actions, monte_carlo, rewards, states, transition_probs
+from mc_learner import MonteCarloLearner, compile_environment
+
+NUM_EPISODES = 5000
+GAMMA = 1.0
+EPSILON = 0.4
+
+
+def episodes_per_second(run):
+    start = time.perf_counter()
+    run()
+    return NUM_EPISODES / (time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    model = compile_environment(states, actions, rewards, transition_probs)
+
+    # before: np.random.choice over dicts on every step
+    np.random.seed(0)
+    before = episodes_per_second(lambda: monte_carlo(GAMMA, NUM_EPISODES, EPSILON))
+    # after: compiled cumulative-probability tables and block-drawn uniform numbers
+    np.random.seed(0)
+    after = episodes_per_second(lambda: MonteCarloLearner(model, GAMMA, EPSILON).run(NUM_EPISODES))
+    np.random.seed(0)
+    after_generator = episodes_per_second(
+        lambda: MonteCarloLearner(model, GAMMA, EPSILON, rng=np.random.default_rng(0)).run(NUM_EPISODES))
+
+    print(f"{'sampler':<45} {'episodes/s':>12} {'speedup':>8}")
+    print(f"{'np.random.choice per step (main.monte_carlo)':<45} {before:>12.0f} {1:>8.1f}")
+    print(f"{'compiled tables, global stream blocks':<45} {after:>12.0f} {after / before:>8.1f}")
+    print(f"{'compiled tables, Generator blocks':<45} {after_generator:>12.0f} {after_generator / before:>8.1f}")
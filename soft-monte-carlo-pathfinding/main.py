@@ -1,5 +1,14 @@
+import argparse
+import os
+import sys
+
 import numpy as np
 
+# the shared checkpoint module lives in the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from checkpoint import checkpoint_exists
+from mc_learner import MonteCarloLearner, compile_environment
+
 # Environment: states and actions and rewards
 states = ['T1', 'A', 'START', 'B', 'C', 'D', 'E', 'T2']
 actions = ['left', 'right']
@@ -75,13 +84,37 @@ def monte_carlo(gamma, num_episodes, epsilon):
     return policy
 
 
-# gamma values to test
-gamma_values = [1.0, 0.5, 0.1]
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Monte Carlo control with a soft policy for goals A and B")
+    parser.add_argument('--gammas', type=float, nargs='+', default=[1.0, 0.5, 0.1], help="gamma values to test")
+    parser.add_argument('--episodes', type=int, default=1000)
+    parser.add_argument('--epsilon', type=float, default=0.4, help="exploration rate of the soft policy")
+    parser.add_argument('--seed', type=int, default=None,
+                        help="seed of the global NumPy stream, a resumed checkpoint restores its saved state instead")
+    parser.add_argument('--checkpoint-dir', default=None,
+                        help="directory of the learned Q-values, existing checkpoints are resumed")
+    args = parser.parse_args()
+
+    gamma_values, num_episodes, checkpoint_dir = args.gammas, args.episodes, args.checkpoint_dir
+    if args.seed is not None:
+        np.random.seed(args.seed)
+
+    # integer-encoded environment for the incremental learner (the algorithm of monte_carlo above, O(1) per update)
+    model = compile_environment(states, actions, rewards, transition_probs)
 
-# get optimal policy for each gamma value
-for i, gamma in enumerate(gamma_values):
-    policy = monte_carlo(gamma, num_episodes=1000, epsilon=0.4)
+    # get optimal policy for each gamma value
+    for i, gamma in enumerate(gamma_values):
+        learner = MonteCarloLearner(model, gamma, epsilon=args.epsilon)
+        # one checkpoint per gamma and epsilon, a run with another epsilon starts its own
+        checkpoint_path = (os.path.join(checkpoint_dir, f'gamma_{gamma}_epsilon_{args.epsilon}.npz') if checkpoint_dir
+                           else None)
+        if checkpoint_path is not None and checkpoint_exists(checkpoint_path):
+            learner.load_checkpoint(checkpoint_path)
+        learner.run(max(0, num_episodes - learner.episodes))
+        if checkpoint_path is not None:
+            learner.save_checkpoint(checkpoint_path)
+        policy = learner.policy_dict()
 
-    print("optimal policy with gamma: ", gamma)
-    print(policy)
-    print('**********************************************************************************************************************')
+        print("optimal policy with gamma: ", gamma)
+        print(policy)
+        print('**********************************************************************************************************************')
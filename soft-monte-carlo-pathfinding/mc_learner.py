@@ -0,0 +1,161 @@
+import bisect
+import itertools
+import os
+import sys
+
+import numpy as np
+
+# the shared checkpoint module lives in the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from checkpoint import check_parameters, load_checkpoint, restore_rngs, save_checkpoint
+
+
+# the chain environment with integer-encoded states and actions (indices into states / actions)
+# transition_probs is compiled once into cumulative-probability lists, sampling searches one uniform number in them
+# exactly like np.random.choice(..., p=...) does
+class ChainModel:
+    def __init__(self, states, actions, rewards, transition_probs, start='START'):
+        self.states = list(states)
+        self.actions = list(actions)
+        self.num_states = len(self.states)
+        self.num_actions = len(self.actions)
+        index = {state: i for i, state in enumerate(self.states)}
+        self.start = index[start]
+
+        # states without any transition are terminal (T1, T2)
+        self.terminal = [not any(transition_probs[state][action] for action in self.actions) for state in self.states]
+        # reward received when entering each state
+        self.reward = [float(rewards[state]) for state in self.states]
+
+        # next states and cumulative probabilities of every (state, action), in the order of transition_probs
+        self.next_states = [[[] for action in self.actions] for state in self.states]
+        self.next_cdf = [[[] for action in self.actions] for state in self.states]
+        for s, state in enumerate(self.states):
+            for a, action in enumerate(self.actions):
+                outcomes = transition_probs[state][action]
+                if outcomes:
+                    self.next_states[s][a] = [index[next_state] for next_state in outcomes]
+                    self.next_cdf[s][a] = _cdf(list(outcomes.values()))
+
+    # cumulative probabilities of the soft policy for each greedy action
+    def soft_policy_cdfs(self, epsilon):
+        cdfs = []
+        for best_action in range(self.num_actions):
+            action_probs = np.ones(self.num_actions) * epsilon / self.num_actions
+            action_probs[best_action] += 1 - epsilon
+            cdfs.append(_cdf(action_probs))
+        return cdfs
+
+
+# same normalisation as np.random.choice, so searching a uniform sample gives the same index
+def _cdf(probs):
+    cdf = np.cumsum(probs, dtype=float)
+    cdf /= cdf[-1]
+    return cdf.tolist()
+
+
+def compile_environment(states, actions, rewards, transition_probs, start='START'):
+    return ChainModel(states, actions, rewards, transition_probs, start)
+
+
+# Monte Carlo control with a soft policy on integer-indexed (n_states, n_actions) count and mean arrays
+# Q(s, a) is updated incrementally (mean += (G - mean) / count), so memory and time per update stay constant
+# by default every visit is used (like monte_carlo in main.py), first_visit=True only uses the first visit of an episode
+# uniform numbers are drawn in blocks of block_size from rng (a np.random.Generator, default: the global np.random
+# stream). Seeded the same way, a single learner gives the same numbers as one monte_carlo run in main.py, but the
+# unused rest of its last block is lost, so a second learner on the same global stream starts further along than a
+# second monte_carlo run would
+class MonteCarloLearner:
+    def __init__(self, model, gamma, epsilon, first_visit=False, rng=None, block_size=4096):
+        self.model = model
+        self.gamma = gamma
+        self.epsilon = epsilon
+        self.first_visit = first_visit
+        self.rng = np.random if rng is None else rng
+        self.counts = np.zeros((model.num_states, model.num_actions), dtype=np.int64)
+        self.q_values = np.zeros((model.num_states, model.num_actions))
+        # random initial policy like main.py, -1 for terminal states
+        self.policy = np.array([-1 if terminal else self.rng.choice(model.num_actions) for terminal in model.terminal])
+        # greedy action of every state under the current Q-values (argmax of zeros => first action)
+        self.greedy = [0] * model.num_states
+        self.episodes = 0
+        self.action_cdfs = model.soft_policy_cdfs(epsilon)
+        # endless stream of pre-generated uniform numbers, refilled one block at a time
+        self.block_size = block_size
+        self.uniforms = itertools.chain.from_iterable(iter(lambda: self.rng.random(block_size).tolist(), None))
+
+    def generate_episode(self):
+        model = self.model
+        uniform = self.uniforms.__next__
+        states_visited, actions_taken, rewards_received = [], [], []
+        state = model.start
+        while not model.terminal[state]:
+            action = bisect.bisect_right(self.action_cdfs[self.greedy[state]], uniform())
+            next_index = bisect.bisect_right(model.next_cdf[state][action], uniform())
+            next_state = model.next_states[state][action][next_index]
+            states_visited.append(state)
+            actions_taken.append(action)
+            rewards_received.append(model.reward[next_state])
+            state = next_state
+        return states_visited, actions_taken, rewards_received
+
+    def update(self, states_visited, actions_taken, rewards_received):
+        if self.first_visit:
+            first_time = {}
+            for t, state_action in enumerate(zip(states_visited, actions_taken)):
+                first_time.setdefault(state_action, t)
+        G = 0
+        for t in reversed(range(len(states_visited))):
+            state_t = states_visited[t]
+            action_t = actions_taken[t]
+            G = self.gamma * G + rewards_received[t]
+            if self.first_visit and first_time[(state_t, action_t)] != t:
+                continue
+            self.counts[state_t, action_t] += 1
+            self.q_values[state_t, action_t] += (G - self.q_values[state_t, action_t]) / self.counts[state_t, action_t]
+            best_action = int(np.argmax(self.q_values[state_t]))
+            self.greedy[state_t] = best_action
+            self.policy[state_t] = best_action
+
+    def run(self, num_episodes):
+        for episode in range(num_episodes):
+            self.update(*self.generate_episode())
+            self.episodes += 1
+        return self
+
+    # save counts, Q-values, policy and the generator state
+    # uniform numbers that were drawn in advance but not used yet are not saved, so a resumed run continues with the
+    # generator's next block (a statistically equivalent, but not bit-identical continuation)
+    def save_checkpoint(self, path):
+        arrays = {'counts': self.counts, 'q_values': self.q_values, 'policy': self.policy,
+                  'greedy': np.array(self.greedy)}
+        metadata = {'gamma': self.gamma, 'epsilon': self.epsilon, 'first_visit': self.first_visit,
+                    'episodes': self.episodes, 'states': self.model.states, 'actions': self.model.actions}
+        return save_checkpoint(path, arrays, metadata, rngs={'rng': self.rng})
+
+    # a checkpoint of another environment, or trained with another gamma, epsilon or first_visit, raises a ValueError
+    def load_checkpoint(self, path, restore_rng=True):
+        arrays, metadata = load_checkpoint(path)
+        if metadata['states'] != self.model.states or metadata['actions'] != self.model.actions:
+            raise ValueError(f"checkpoint {path} was saved for a different environment")
+        check_parameters(path, metadata,
+                         {'gamma': self.gamma, 'epsilon': self.epsilon, 'first_visit': self.first_visit})
+        self.counts = np.array(arrays['counts'])
+        self.q_values = np.array(arrays['q_values'])
+        self.policy = np.array(arrays['policy'])
+        self.greedy = arrays['greedy'].tolist()
+        self.episodes = metadata['episodes']
+        if restore_rng:
+            restore_rngs(metadata, {'rng': self.rng})
+            # drop numbers drawn from the old state, the stream restarts from the restored generator
+            self.uniforms = itertools.chain.from_iterable(iter(lambda: self.rng.random(self.block_size).tolist(), None))
+        return metadata
+
+    # policy in the format of main.py: {state: action, terminal states: 'None'}
+    def policy_dict(self):
+        return {state: self.model.actions[action] if action >= 0 else 'None'
+                for state, action in zip(self.model.states, self.policy)}
+
+
+def incremental_monte_carlo(model, gamma, num_episodes, epsilon, first_visit=False, rng=None):
+    return MonteCarloLearner(model, gamma, epsilon, first_visit, rng).run(num_episodes).policy_dict()
@@ -0,0 +1,90 @@
+import argparse
+import csv
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from main import actions, rewards, states, transition_probs
+from mc_learner import MonteCarloLearner, compile_environment
+
+
+# a single (gamma, epsilon, seed) job, its random stream only depends on the base seed and the job's position
+def run_job(job):
+    cell_index, seed_index, gamma, epsilon, num_episodes, base_seed = job
+    rng = np.random.default_rng(np.random.SeedSequence(base_seed, spawn_key=(cell_index, seed_index)))
+    model = compile_environment(states, actions, rewards, transition_probs)
+    learner = MonteCarloLearner(model, gamma, epsilon, rng=rng).run(num_episodes)
+    return cell_index, seed_index, learner.policy, learner.q_values
+
+
+# run num_seeds learners for every (gamma, epsilon) cell of the grid, spread over a process pool
+# returns the policies (cells, seeds, states) and Q-values (cells, seeds, states, actions) of all jobs
+def run_study(gamma_values, epsilon_values, num_seeds=20, num_episodes=1000, base_seed=0, workers=None):
+    cells = [(gamma, epsilon) for gamma in gamma_values for epsilon in epsilon_values]
+    jobs = [(i, k, gamma, epsilon, num_episodes, base_seed) for i, (gamma, epsilon) in enumerate(cells)
+            for k in range(num_seeds)]
+    policies = np.zeros((len(cells), num_seeds, len(states)), dtype=np.int64)
+    q_values = np.zeros((len(cells), num_seeds, len(states), len(actions)))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        chunksize = max(1, len(jobs) // (4 * (workers or os.cpu_count() or 1)))
+        for cell_index, seed_index, policy, q in executor.map(run_job, jobs, chunksize=chunksize):
+            policies[cell_index, seed_index] = policy
+            q_values[cell_index, seed_index] = q
+    return cells, policies, q_values
+
+
+# one row per (gamma, epsilon, state): modal action, share of seeds that agree with it, and per action the mean
+# Q-value with a normal-approximation confidence interval over the seeds
+# policy_agreement is the share of seeds whose whole policy equals the modal action of every state
+def summarize(cells, policies, q_values, z=1.96):
+    num_seeds = policies.shape[1]
+    rows = []
+    for (gamma, epsilon), cell_policies, cell_q in zip(cells, policies, q_values):
+        modal = np.array([np.bincount(column[column >= 0], minlength=len(actions)).argmax()
+                          if np.any(column >= 0) else -1 for column in cell_policies.T])
+        agrees = cell_policies == modal
+        policy_agreement = np.mean(agrees.all(axis=1))
+        q_mean = cell_q.mean(axis=0)
+        q_half_width = z * cell_q.std(axis=0, ddof=1) / np.sqrt(num_seeds) if num_seeds > 1 else np.zeros_like(q_mean)
+        for s, state in enumerate(states):
+            if modal[s] < 0:
+                continue  # terminal state
+            row = {'gamma': gamma, 'epsilon': epsilon, 'state': state, 'modal_action': actions[modal[s]],
+                   'state_agreement': np.mean(agrees[:, s]), 'policy_agreement': policy_agreement}
+            for a, action in enumerate(actions):
+                row[f'q_{action}_mean'] = q_mean[s, a]
+                row[f'q_{action}_ci_low'] = q_mean[s, a] - q_half_width[s, a]
+                row[f'q_{action}_ci_high'] = q_mean[s, a] + q_half_width[s, a]
+            rows.append(row)
+    return rows
+
+
+def save_table(path, rows):
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="gamma x epsilon sensitivity study of soft-policy Monte Carlo")
+    parser.add_argument('--gammas', type=float, nargs='+', default=[1.0, 0.9, 0.7, 0.5, 0.3, 0.1])
+    parser.add_argument('--epsilons', type=float, nargs='+', default=[0.1, 0.2, 0.4, 0.6])
+    parser.add_argument('--seeds', type=int, default=20, help="independent learners per cell")
+    parser.add_argument('--episodes', type=int, default=1000, help="episodes per learner")
+    parser.add_argument('--seed', type=int, default=0, help="base seed of the study")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument('--out', default='sensitivity.csv', help="result table (CSV)")
+    args = parser.parse_args()
+
+    cells, policies, q_values = run_study(args.gammas, args.epsilons, args.seeds, args.episodes, args.seed,
+                                          args.workers)
+    rows = summarize(cells, policies, q_values)
+    save_table(args.out, rows)
+
+    for row in rows:
+        if row['state'] == 'START':
+            print(f"gamma {row['gamma']:<4} epsilon {row['epsilon']:<4} START => {row['modal_action']:<5} "
+                  f"state agreement {row['state_agreement']:.2f}  policy agreement {row['policy_agreement']:.2f}")
+    print("results saved to", args.out)